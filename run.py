@@ -5,87 +5,192 @@ Single, clean interface for STAR alignment processing with intelligent resource
 """
 
 import os
+import re
 import sys
 import subprocess
 import argparse
 import csv
 import json
+import shlex
+import shutil
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
 from datetime import datetime
 
-# Import resource manager
-sys.path.append(str(Path(__file__).parent / "scripts"))
-from resource_manager import AdvancedResourceManager as ResourceManager
+# Colors for output (plain text when NO_COLOR is set or stdout isn't a terminal)
+if os.environ.get('NO_COLOR') or not sys.stdout.isatty():
+    RED = GREEN = YELLOW = BLUE = NC = ''
+else:
+    RED = '\033[0;31m'
+    GREEN = '\033[0;32m'
+    YELLOW = '\033[1;33m'
+    BLUE = '\033[0;34m'
+    NC = '\033[0m' # No Color
+
+# Workflow paths (commands are run from the workflow directory)
+WORKFLOW_DIR = Path.cwd()
+DATA_DIR = WORKFLOW_DIR / "data"
+SCRIPTS_DIR = WORKFLOW_DIR / "scripts"
+CHUNKS_DIR = WORKFLOW_DIR / "chunks"
+LOGS_DIR = WORKFLOW_DIR / "logs"
+MANIFEST_FILE = DATA_DIR / "sample_manifest.csv"
+CHUNK_STATUS_DB = DATA_DIR / "chunk_status.db"
+# Chunk status file from before the database; imported once, see import_legacy_chunk_status()
+LEGACY_CHUNK_STATUS_FILE = DATA_DIR / "chunk_status.csv"
+CONFIG_FILE = DATA_DIR / "advanced_resource_config.json"
+
+# I/O buffer for manifest reads and chunk manifest writes
+WRITE_BUFFER_SIZE = 1 << 20
+
+MANIFEST_FIELDS = ['sample_id', 'r1_path', 'r2_path', 'r1_size', 'r2_size', 'status']
+
+CHUNK_STATUS_FIELDS = ['chunk_id', 'chunk_file', 'start_idx', 'end_idx', 'sample_count',
+                       'status', 'created_at', 'started_at', 'completed_at',
+                       'failed_samples', 'completed_samples']
+
+# bsub prints one of these per accepted submission
+JOB_SUBMITTED_RE = re.compile(r"^Job <(\d+)> is submitted", re.MULTILINE)
+CHUNK_JOB_PREFIX = "star_chunk_"
+
+CHUNK_STATUS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id TEXT PRIMARY KEY,
+    chunk_file TEXT,
+    start_idx INTEGER,
+    end_idx INTEGER,
+    sample_count INTEGER,
+    status TEXT,
+    created_at TEXT,
+    started_at TEXT,
+    completed_at TEXT,
+    failed_samples INTEGER,
+    completed_samples INTEGER
+)
+"""
+
+# Resource manager instances and resource snapshots, keyed by workflow directory
+RESOURCE_CACHE_TTL = 30  # seconds
+_rm_cache = {}
+_resources_cache = {}
+
+# Helper script names present in SCRIPTS_DIR, see find_script()
+_script_names = None
+
+# Chunk status database connection, see get_chunk_db()
+_chunk_db = None
+
+def get_resource_manager(workflow_dir):
+    """Return the ResourceManager for workflow_dir, creating it once per run."""
+    workflow_dir = Path(workflow_dir)
+    if workflow_dir not in _rm_cache:
+        # Imported on first use so help and other lightweight commands skip psutil/numpy
+        sys.path.append(str(Path(__file__).parent / "scripts"))
+        from resource_manager import AdvancedResourceManager as ResourceManager
+        
+        _rm_cache[workflow_dir] = ResourceManager(workflow_dir)
+    return _rm_cache[workflow_dir]
 
-# Colors for output
-RED = '\033[0;31m'
-GREEN = '\033[0;32m'
-YELLOW = '\033[1;33m'
-BLUE = '\033[0;34m'
-NC = '\033[0m' # No Color
+def get_resources_cached(resource_manager):
+    """Return current system resources, reusing a snapshot younger than RESOURCE_CACHE_TTL."""
+    key = resource_manager.workflow_dir
+    cached = _resources_cache.get(key)
+    if cached and time.monotonic() - cached[1] < RESOURCE_CACHE_TTL:
+        return cached[0]
+    
+    resources = resource_manager.get_current_resources()
+    if resources:
+        _resources_cache[key] = (resources, time.monotonic())
+    return resources
+
+def list_files(directory):
+    """Return the names of regular files in directory with a single scandir."""
+    try:
+        with os.scandir(directory) as entries:
+            return {e.name for e in entries if e.is_file()}
+    except FileNotFoundError:
+        return set()
+
+def find_script(name):
+    """Return the path of a helper script, or None if it isn't installed."""
+    global _script_names
+    if _script_names is None:
+        _script_names = list_files(SCRIPTS_DIR)
+    return SCRIPTS_DIR / name if name in _script_names else None
 
 def print_status(color, message):
     """Print colored status message."""
-    print(f"{color}{message}{NC}")
+    sys.stdout.write(f"{color}{message}{NC}\n")
 
 def check_prerequisites():
     """Check if prerequisites are met."""
     print_status(BLUE, "🔍 Checking prerequisites...")
     
     # Check if we're in the right directory
-    workflow_dir = Path.cwd()
-    if not (workflow_dir / "scripts").exists():
+    if not SCRIPTS_DIR.exists():
         print_status(RED, "❌ Error: Not in workflow directory")
         print_status(YELLOW, "💡 Run from: /data/salomonis-archive/czb-tabula-sapiens/star_workflow")
         return False
     
     # Check if manifest exists
-    manifest_file = workflow_dir / "data" / "sample_manifest.csv"
-    if not manifest_file.exists():
+    if not MANIFEST_FILE.exists():
         print_status(YELLOW, "⚠️  Manifest not found. Creating...")
-        return create_manifest()
+        return create_manifest() is not None
     
     print_status(GREEN, "✅ Prerequisites check passed")
     return True
 
 def create_manifest():
-    """Create sample manifest."""
+    """Create sample manifest, returning the number of samples (None on failure)."""
     print_status(BLUE, "📋 Creating sample manifest...")
     
-    workflow_dir = Path.cwd()
-    script_path = workflow_dir / "scripts" / "create_manifest.py"
+    script_path = find_script("create_manifest.py")
     
-    if not script_path.exists():
+    if script_path is None:
         print_status(RED, "❌ Error: create_manifest.py not found")
-        return False
-    
-    try:
-        result = subprocess.run([sys.executable, str(script_path)], 
-                              capture_output=True, text=True, check=True)
-        print(result.stdout)
-        print_status(GREEN, "✅ Manifest created successfully")
-        return True
-    except subprocess.CalledProcessError as e:
-        print_status(RED, f"❌ Error creating manifest: {e.stderr}")
-        return False
-
-def create_chunks(chunk_size=None):
-    """Create chunk manifests with intelligent sizing."""
+        return None
+    
+    # Stream rows from the scanner straight into the manifest, counting them as
+    # they arrive so create_chunks() doesn't have to re-read the file.
+    # Scanner progress and errors go to stderr, which is passed through.
+    sys.stdout.flush()
+    partial_file = MANIFEST_FILE.with_suffix('.csv.partial')
+    total_samples = -1  # Header line
+    with subprocess.Popen([sys.executable, script_path, '--stream'],
+                          stdout=subprocess.PIPE, text=True, bufsize=WRITE_BUFFER_SIZE) as proc, \
+            open(partial_file, 'w', newline='', buffering=WRITE_BUFFER_SIZE) as out:
+        for line in proc.stdout:
+            out.write(line)
+            total_samples += 1
+    
+    if proc.returncode != 0:
+        partial_file.unlink()
+        print_status(RED, f"❌ Error creating manifest (exit code {proc.returncode})")
+        return None
+    
+    partial_file.replace(MANIFEST_FILE)
+    print_status(GREEN, f"✅ Manifest created successfully ({total_samples} samples)")
+    return total_samples
+
+def create_chunks(chunk_size=None, total_samples=None):
+    """Create chunk manifests with intelligent sizing.
+    
+    total_samples can be passed when the caller already knows the manifest
+    row count (e.g. straight after create_manifest()).
+    """
     print_status(BLUE, "📦 Creating chunk manifests...")
     
-    workflow_dir = Path.cwd()
-    manifest_file = workflow_dir / "data" / "sample_manifest.csv"
-    
-    if not manifest_file.exists():
+    if not MANIFEST_FILE.exists():
         print_status(RED, "❌ Error: Manifest file not found")
         return False
     
-    # Count samples
-    with open(manifest_file, 'r') as f:
-        reader = csv.DictReader(f)
-        samples = list(reader)
+    if total_samples is None:
+        total_samples = count_manifest_rows(MANIFEST_FILE)
     
-    total_samples = len(samples)
     print_status(BLUE, f"📊 Total samples: {total_samples}")
     
     # Calculate storage requirement (5.29 TB total FASTQ data)
@@ -93,7 +198,7 @@ def create_chunks(chunk_size=None):
     total_storage_gb = storage_per_sample_gb * total_samples * 3  # 3x for BAM files
     
     # Initialize resource manager
-    resource_manager = ResourceManager(workflow_dir)
+    resource_manager = get_resource_manager(WORKFLOW_DIR)
     
     # Get optimal chunk size
     if chunk_size is None:
@@ -104,83 +209,111 @@ def create_chunks(chunk_size=None):
         print_status(BLUE, f"📏 User-specified chunk size: {optimal_chunk_size} samples per chunk")
     
     # Create chunks directory
-    chunks_dir = workflow_dir / "chunks"
-    chunks_dir.mkdir(exist_ok=True)
+    CHUNKS_DIR.mkdir(exist_ok=True)
     
     # Create chunk manifests
     total_chunks = (total_samples + optimal_chunk_size - 1) // optimal_chunk_size
     chunk_status = []
     
-    for chunk_idx in range(total_chunks):
-        start_idx = chunk_idx * optimal_chunk_size
-        end_idx = min(start_idx + optimal_chunk_size, total_samples)
-        chunk_samples = samples[start_idx:end_idx]
-        
-        chunk_id = f"chunk_{chunk_idx + 1:03d}"
-        chunk_file = chunks_dir / f"{chunk_id}_manifest.csv"
-        
-        # Write chunk manifest
-        with open(chunk_file, 'w', newline='') as f:
-            fieldnames = ['sample_id', 'r1_path', 'r2_path', 'r1_size', 'r2_size', 'status']
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(chunk_samples)
-        
-        # Track chunk status
-        chunk_status.append({
-            'chunk_id': chunk_id,
-            'chunk_file': str(chunk_file),
-            'start_idx': start_idx + 1,
-            'end_idx': end_idx,
-            'sample_count': len(chunk_samples),
-            'status': 'pending',
-            'created_at': datetime.now().isoformat(),
-            'started_at': None,
-            'completed_at': None,
-            'failed_samples': 0,
-            'completed_samples': 0
-        })
-        
-        print_status(GREEN, f"✅ Created {chunk_id}: samples {start_idx + 1}-{end_idx} ({len(chunk_samples)} samples)")
-    
-    # Save chunk status
-    chunk_status_file = workflow_dir / "data" / "chunk_status.csv"
-    with open(chunk_status_file, 'w', newline='') as f:
-        fieldnames = ['chunk_id', 'chunk_file', 'start_idx', 'end_idx', 'sample_count', 
-                     'status', 'created_at', 'started_at', 'completed_at', 
-                     'failed_samples', 'completed_samples']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(chunk_status)
+    # Stream the manifest once; each chunk's rows are handed to a writer thread
+    # so chunk files are written concurrently (write latency dominates on NFS)
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    in_flight = deque()
+    with open(MANIFEST_FILE, 'r', newline='') as f, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        reader = csv.reader(f)
+        header = next(reader)
+        # Normalize rows to tuples in the manifest's canonical column order
+        to_row = itemgetter(*(header.index(field) for field in MANIFEST_FIELDS))
+        rows = map(to_row, reader)
+        
+        for chunk_idx in range(total_chunks):
+            start_idx = chunk_idx * optimal_chunk_size
+            end_idx = min(start_idx + optimal_chunk_size, total_samples)
+            sample_count = end_idx - start_idx
+            
+            chunk_id = f"chunk_{chunk_idx + 1:03d}"
+            chunk_file = CHUNKS_DIR / f"{chunk_id}_manifest.csv"
+            
+            # Bound the rows held in memory by pending writes
+            if len(in_flight) >= max_workers * 2:
+                in_flight.popleft().result()
+            in_flight.append(executor.submit(write_chunk_manifest, chunk_file,
+                                             list(islice(rows, sample_count))))
+            
+            # Track chunk status
+            chunk_status.append({
+                'chunk_id': chunk_id,
+                'chunk_file': str(chunk_file),
+                'start_idx': start_idx + 1,
+                'end_idx': end_idx,
+                'sample_count': sample_count,
+                'status': 'pending',
+                'created_at': datetime.now().isoformat(),
+                'started_at': None,
+                'completed_at': None,
+                'failed_samples': 0,
+                'completed_samples': 0
+            })
+        
+        # Surface any write error before recording the chunks
+        for future in in_flight:
+            future.result()
+    
+    sys.stdout.write("".join(
+        f"{GREEN}✅ Created {c['chunk_id']}: samples {c['start_idx']}-{c['end_idx']} ({c['sample_count']} samples){NC}\n"
+        for c in chunk_status))
+    
+    # Record the new chunk set; status from any previous chunking no longer applies
+    save_chunk_snapshot(chunk_status)
     
     print_status(GREEN, f"🎉 Created {total_chunks} chunks successfully!")
     return True
 
+def count_manifest_rows(manifest_file):
+    """Count data rows by scanning raw bytes for newlines (no CSV parsing).
+    
+    Manifest fields are sample IDs, paths and sizes, so rows never contain
+    embedded newlines.
+    """
+    lines = 0
+    last = b"\n"
+    with open(manifest_file, 'rb') as f:
+        while block := f.read(WRITE_BUFFER_SIZE):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1  # Final row without a trailing newline
+    return max(lines - 1, 0)  # Minus the header
+
+def write_chunk_manifest(chunk_file, rows):
+    """Write one chunk manifest (runs in a writer thread)."""
+    with open(chunk_file, 'w', newline='', buffering=WRITE_BUFFER_SIZE) as out:
+        writer = csv.writer(out)
+        writer.writerow(MANIFEST_FIELDS)
+        writer.writerows(rows)
+
 def submit_jobs(chunk_id=None):
     """Submit STAR alignment jobs with intelligent resource management."""
     print_status(BLUE, "🚀 Submitting STAR alignment jobs...")
     
-    workflow_dir = Path.cwd()
-    resource_manager = ResourceManager(workflow_dir)
+    resource_manager = get_resource_manager(WORKFLOW_DIR)
     
     # Check resource status
     print_status(BLUE, "🔍 Checking system resources...")
-    resources = resource_manager.get_current_resources()
+    resources = get_resources_cached(resource_manager)
     if resources:
         print_status(BLUE, f"💾 Storage: {resources['storage']['usage_percent']:.1f}% used")
         print_status(BLUE, f"🖥️  CPU: {resources['cpu']['usage_percent']:.1f}% used")
     
     # Check if chunks exist
-    chunk_status_file = workflow_dir / "data" / "chunk_status.csv"
-    if not chunk_status_file.exists():
+    if get_chunk_db() is None:
         print_status(YELLOW, "⚠️  No chunks found. Creating with intelligent sizing...")
         if not create_chunks():
             return False
     
     # Read chunk status
-    with open(chunk_status_file, 'r') as f:
-        reader = csv.DictReader(f)
-        chunks = list(reader)
+    chunks = load_chunk_state()
     
     if chunk_id:
         # Submit specific chunk
@@ -205,9 +338,8 @@ def submit_jobs(chunk_id=None):
     print_status(BLUE, f"📦 Submitting {len(chunks_to_submit)} chunks...")
     
     # Get job resources from advanced config
-    config_file = workflow_dir / "data" / "advanced_resource_config.json"
     try:
-        with open(config_file, 'r') as f:
+        with open(CONFIG_FILE, 'r') as f:
             config = json.load(f)
         # Extract basic job resources from advanced config
         hpc_config = config.get('hpc_environment', {})
@@ -229,169 +361,229 @@ def submit_jobs(chunk_id=None):
             'queue': 'normal'
         }
     
-    success_count = 0
+    bsub = shutil.which('bsub')
+    if bsub is None:
+        print_status(RED, "❌ Error: bsub not found in PATH")
+        return False
+    
+    LOGS_DIR.mkdir(exist_ok=True)
+    
+    # Build argv for each chunk up front from one shared template
+    template = build_bsub_template(bsub, job_resources)
+    align_script = str(SCRIPTS_DIR / "star_align.sh")
+    existing_chunks = list_files(CHUNKS_DIR)
+    submissions = {}
     for chunk in chunks_to_submit:
         chunk_file = Path(chunk['chunk_file'])
-        if not chunk_file.exists():
+        if chunk_file.name not in existing_chunks:
             print_status(RED, f"❌ Error: Chunk file not found: {chunk_file}")
             continue
-        
-        # Create job submission script
-        job_script = create_job_submission_script(chunk, job_resources)
-        
-        try:
-            result = subprocess.run(['bash', str(job_script)], 
-                                  capture_output=True, text=True, check=True)
-            print_status(GREEN, f"✅ Chunk {chunk['chunk_id']} submitted successfully!")
-            success_count += 1
-            
-            # Update chunk status
-            update_chunk_status(chunk['chunk_id'], 'running', started_at=datetime.now().isoformat())
-            
-        except subprocess.CalledProcessError as e:
-            print_status(RED, f"❌ Error submitting chunk {chunk['chunk_id']}: {e.stderr}")
+        submissions[chunk['chunk_id']] = build_bsub_command(template, chunk, align_script)
     
+    if not submissions:
+        return False
+    
+    # One bsub round-trip per run where possible: several chunks are packed into
+    # one `bsub -pack` request (one job array per line); without -pack support
+    # (LSB_MAX_PACK_JOBS unset) each chunk is submitted on its own
+    chunk_jobs = submit_chunk_pack(bsub, submissions) if len(submissions) > 1 else None
+    if chunk_jobs is None:
+        chunk_jobs = {}
+        for chunk_id, argv in submissions.items():
+            job_id = submit_chunk(chunk_id, argv)
+            if job_id is not None:
+                chunk_jobs[chunk_id] = job_id
+    
+    # Only chunks LSF accepted leave 'pending', so a rerun resubmits just the rest
+    started_at = datetime.now().isoformat()
+    for chunk_id, job_id in chunk_jobs.items():
+        print_status(GREEN, f"✅ Chunk {chunk_id} submitted as job {job_id}")
+        update_chunk_status(chunk_id, 'running', started_at=started_at)
+    
+    success_count = len(chunk_jobs)
     print_status(GREEN, f"✅ Successfully submitted {success_count}/{len(chunks_to_submit)} chunks")
     return success_count == len(chunks_to_submit)
 
-def create_job_submission_script(chunk, job_resources):
-    """Create job submission script for a chunk."""
-    workflow_dir = Path.cwd()
-    chunks_dir = workflow_dir / "chunks"
-    
-    script_content = f"""#!/bin/bash
-# Chunked STAR Alignment Job Submission
-# Chunk: {chunk['chunk_id']}
-
-set -euo pipefail
-
-# Configuration
-CHUNK_ID="{chunk['chunk_id']}"
-CHUNK_FILE="{chunk['chunk_file']}"
-WORKFLOW_DIR="{workflow_dir}"
-SCRIPT_DIR="{workflow_dir}/scripts"
-ALIGN_SCRIPT="${{SCRIPT_DIR}}/star_align.sh"
-
-# Colors
-RED='\\033[0;31m'
-GREEN='\\033[0;32m'
-YELLOW='\\033[1;33m'
-BLUE='\\033[0;34m'
-NC='\\033[0m'
-
-print_status() {{
-    local color=$1
-    local message=$2
-    echo -e "${{color}}${{message}}${{NC}}"
-}}
-
-# Validate files
-if [[ ! -f "${{CHUNK_FILE}}" ]]; then
-    print_status $RED "❌ ERROR: Chunk file not found: ${{CHUNK_FILE}}"
-    exit 1
-fi
-
-if [[ ! -f "${{ALIGN_SCRIPT}}" ]]; then
-    print_status $RED "❌ ERROR: Alignment script not found: ${{ALIGN_SCRIPT}}"
-    exit 1
-fi
-
-# Count samples in chunk
-TOTAL_SAMPLES=$(tail -n +2 "${{CHUNK_FILE}}" | wc -l)
-print_status $BLUE "📊 Chunk ${{CHUNK_ID}}: ${{TOTAL_SAMPLES}} samples"
-
-# LSF Configuration
-JOB_NAME="star_chunk_{chunk['chunk_id']}"
-CPUS_PER_JOB={job_resources['cpus']}
-MEMORY_PER_JOB="{job_resources['memory']}"
-WALLTIME="{job_resources['walltime']}"
-QUEUE="{job_resources['queue']}"
-
-print_status $BLUE "📋 Job Configuration:"
-echo "Job Name: ${{JOB_NAME}}"
-echo "Array Size: 1-${{TOTAL_SAMPLES}}"
-echo "CPUs per Job: ${{CPUS_PER_JOB}}"
-echo "Memory per Job: ${{MEMORY_PER_JOB}}"
-echo "Walltime: ${{WALLTIME}}"
-echo "Queue: ${{QUEUE}}"
-
-# Submit job array
-print_status $GREEN "🚀 Submitting chunk ${{CHUNK_ID}}..."
-
-bsub -J "${{JOB_NAME}}[1-${{TOTAL_SAMPLES}}]" \\
-     -n ${{CPUS_PER_JOB}} \\
-     -M ${{MEMORY_PER_JOB}} \\
-     -R "span[hosts=1]" \\
-     -W ${{WALLTIME}} \\
-     -q ${{QUEUE}} \\
-     -o "${{WORKFLOW_DIR}}/logs/${{JOB_NAME}}_%I.out" \\
-     -e "${{WORKFLOW_DIR}}/logs/${{JOB_NAME}}_%I.err" \\
-     "${{ALIGN_SCRIPT}}" "${{CHUNK_FILE}}"
-
-if [[ $? -eq 0 ]]; then
-    print_status $GREEN "✅ Chunk ${{CHUNK_ID}} submitted successfully!"
-    echo ""
-    print_status $BLUE "📊 Monitor jobs with:"
-    echo "  bjobs -J ${{JOB_NAME}}"
-    echo "  bjobs -u \\$(whoami)"
-    echo ""
-    print_status $BLUE "📁 Check logs in:"
-    echo "  ${{WORKFLOW_DIR}}/logs/"
-else
-    print_status $RED "❌ Chunk submission failed!"
-    exit 1
-fi
-"""
-    
-    script_file = chunks_dir / f"submit_{chunk['chunk_id']}.sh"
-    with open(script_file, 'w') as f:
-        f.write(script_content)
-    os.chmod(script_file, 0o755)
-    
-    return script_file
+def submit_chunk(chunk_id, argv):
+    """Submit one chunk with bsub; returns its LSF job ID, or None if it was rejected."""
+    result = subprocess.run(argv, capture_output=True, text=True)
+    match = JOB_SUBMITTED_RE.search(result.stdout)
+    if match is None:
+        print_status(RED, f"❌ Error submitting chunk {chunk_id}: {result.stderr.strip()}")
+        return None
+    return match.group(1)
+
+def submit_chunk_pack(bsub, submissions):
+    """Submit several chunks with one `bsub -pack` request.
+    
+    Returns {chunk_id: job_id} for the chunks LSF accepted, or None when bsub
+    accepted none of them (e.g. -pack is not enabled on this cluster).
+    """
+    pack_file = CHUNKS_DIR / "submit_pack.txt"
+    try:
+        with open(pack_file, 'w') as f:
+            f.writelines(shlex.join(chunk_argv[1:]) + "\n" for chunk_argv in submissions.values())
+        result = subprocess.run([bsub, '-pack', pack_file], capture_output=True, text=True)
+    finally:
+        pack_file.unlink(missing_ok=True)
+    
+    job_ids = JOB_SUBMITTED_RE.findall(result.stdout)
+    if not job_ids:
+        print_status(YELLOW, f"⚠️  bsub -pack failed ({result.stderr.strip()}); submitting chunks one by one")
+        return None
+    if len(job_ids) == len(submissions):
+        # Every line was accepted; bsub reports them in pack file order
+        return dict(zip(submissions, job_ids))
+    
+    # Some lines were rejected: match the accepted jobs to chunks by job name
+    print_status(YELLOW, f"⚠️  bsub -pack accepted {len(job_ids)}/{len(submissions)} chunks: {result.stderr.strip()}")
+    chunk_jobs = lookup_chunk_jobs(job_ids)
+    unmatched = set(job_ids) - set(chunk_jobs.values())
+    if unmatched:
+        print_status(RED, f"❌ Could not match jobs {', '.join(sorted(unmatched))} to chunks; "
+                          "check bjobs before resubmitting")
+    return chunk_jobs
+
+def lookup_chunk_jobs(job_ids):
+    """Return {chunk_id: job_id} for LSF jobs named after chunks."""
+    result = subprocess.run(['bjobs', '-noheader', '-o', 'jobid job_name', *job_ids],
+                            capture_output=True, text=True)
+    chunk_jobs = {}
+    for line in result.stdout.splitlines():
+        fields = line.split()
+        # Job arrays list one element per line, e.g. "123 star_chunk_001[7]"
+        if len(fields) == 2 and fields[1].startswith(CHUNK_JOB_PREFIX):
+            chunk_jobs[fields[1][len(CHUNK_JOB_PREFIX):].split('[')[0]] = fields[0]
+    return chunk_jobs
+
+def build_bsub_template(bsub, job_resources):
+    """Build the bsub options shared by every chunk in a submission."""
+    return [
+        bsub,
+        '-n', str(job_resources['cpus']),
+        '-M', job_resources['memory'],
+        '-R', 'span[hosts=1]',
+        '-W', job_resources['walltime'],
+        '-q', job_resources['queue'],
+    ]
+
+def build_bsub_command(template, chunk, align_script):
+    """Build the bsub argv that submits a chunk as an LSF job array."""
+    job_name = f"{CHUNK_JOB_PREFIX}{chunk['chunk_id']}"
+    
+    return template + [
+        '-J', f"{job_name}[1-{chunk['sample_count']}]",
+        '-o', str(LOGS_DIR / f"{job_name}_%I.out"),
+        '-e', str(LOGS_DIR / f"{job_name}_%I.err"),
+        align_script,
+        chunk['chunk_file'],
+    ]
+
+def get_chunk_db(create=False):
+    """Return the chunk status database connection, or None if there is none yet."""
+    global _chunk_db
+    if _chunk_db is None:
+        legacy = not CHUNK_STATUS_DB.exists() and LEGACY_CHUNK_STATUS_FILE.exists()
+        if not create and not legacy and not CHUNK_STATUS_DB.exists():
+            return None
+        _chunk_db = sqlite3.connect(CHUNK_STATUS_DB, timeout=30)
+        _chunk_db.row_factory = sqlite3.Row
+        # Rollback journal, not WAL: the workflow directory is on shared network
+        # storage, where SQLite's WAL shared-memory index is not supported
+        _chunk_db.execute("PRAGMA journal_mode=DELETE")
+        _chunk_db.execute(CHUNK_STATUS_SCHEMA)
+        if legacy:
+            import_legacy_chunk_status(_chunk_db)
+    return _chunk_db
+
+def import_legacy_chunk_status(db):
+    """Load chunk status from the pre-database CSV file into db."""
+    print_status(BLUE, f"📥 Importing chunk status from {LEGACY_CHUNK_STATUS_FILE.name}...")
+    with open(LEGACY_CHUNK_STATUS_FILE, 'r', newline='') as f:
+        chunks = list(csv.DictReader(f))
+    
+    # csv wrote None as an empty string; counts and indexes go back to integers
+    int_fields = {'start_idx', 'end_idx', 'sample_count', 'failed_samples', 'completed_samples'}
+    rows = []
+    for chunk in chunks:
+        row = []
+        for field in CHUNK_STATUS_FIELDS:
+            value = chunk.get(field)
+            if value in ('', None):
+                value = None
+            elif field in int_fields:
+                value = int(value)
+            row.append(value)
+        rows.append(tuple(row))
+    placeholders = ", ".join("?" for _ in CHUNK_STATUS_FIELDS)
+    with db:
+        db.executemany(f"INSERT OR REPLACE INTO chunks ({', '.join(CHUNK_STATUS_FIELDS)}) VALUES ({placeholders})",
+                       rows)
+    
+    # Keep the old file for reference, but never import it twice
+    LEGACY_CHUNK_STATUS_FILE.rename(LEGACY_CHUNK_STATUS_FILE.with_name(LEGACY_CHUNK_STATUS_FILE.name + ".imported"))
+    print_status(GREEN, f"✅ Imported {len(rows)} chunks into {CHUNK_STATUS_DB.name}")
+
+def save_chunk_snapshot(chunks):
+    """Replace all chunk status rows with a freshly created chunk set."""
+    db = get_chunk_db(create=True)
+    placeholders = ", ".join(f":{field}" for field in CHUNK_STATUS_FIELDS)
+    with db:
+        db.execute("DELETE FROM chunks")
+        db.executemany(f"INSERT INTO chunks ({', '.join(CHUNK_STATUS_FIELDS)}) VALUES ({placeholders})",
+                       chunks)
+
+def load_chunk_state():
+    """Load current chunk state as a list of dicts, in chunk order."""
+    db = get_chunk_db()
+    if db is None:
+        return []
+    return [dict(row) for row in db.execute("SELECT * FROM chunks ORDER BY start_idx")]
+
+def count_chunks_by_status():
+    """Return {status: chunk count}."""
+    db = get_chunk_db()
+    if db is None:
+        return {}
+    return dict(db.execute("SELECT status, COUNT(*) FROM chunks GROUP BY status").fetchall())
 
 def update_chunk_status(chunk_id, status, **kwargs):
-    """Update chunk status."""
-    workflow_dir = Path.cwd()
-    chunk_status_file = workflow_dir / "data" / "chunk_status.csv"
-    
-    if not chunk_status_file.exists():
+    """Update a chunk's status (and any other status columns passed as kwargs)."""
+    db = get_chunk_db()
+    if db is None:
         return
     
-    with open(chunk_status_file, 'r') as f:
-        reader = csv.DictReader(f)
-        chunks = list(reader)
+    fields = {'status': status, **kwargs}
+    unknown = set(fields) - set(CHUNK_STATUS_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown chunk status fields: {', '.join(sorted(unknown))}")
     
-    for chunk in chunks:
-        if chunk['chunk_id'] == chunk_id:
-            chunk['status'] = status
-            for key, value in kwargs.items():
-                chunk[key] = value
-            break
-    
-    with open(chunk_status_file, 'w', newline='') as f:
-        fieldnames = ['chunk_id', 'chunk_file', 'start_idx', 'end_idx', 'sample_count', 
-                     'status', 'created_at', 'started_at', 'completed_at', 
-                     'failed_samples', 'completed_samples']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(chunks)
+    assignments = ", ".join(f"{field} = ?" for field in fields)
+    with db:
+        db.execute(f"UPDATE chunks SET {assignments} WHERE chunk_id = ?",
+                   (*fields.values(), chunk_id))
+
+def exec_script(script_path, *args):
+    """Replace this process with a helper script (only returns on failure)."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if _chunk_db is not None:
+        _chunk_db.close()
+    os.execv(sys.executable, [sys.executable, os.fspath(script_path), *args])
 
 def monitor_progress():
     """Monitor job progress."""
     print_status(BLUE, "📊 Starting progress monitoring...")
     
-    workflow_dir = Path.cwd()
-    script_path = workflow_dir / "scripts" / "monitor.py"
+    script_path = find_script("monitor.py")
     
-    if not script_path.exists():
+    if script_path is None:
         print_status(RED, "❌ Error: monitor.py not found")
         return False
     
     try:
-        subprocess.run([sys.executable, str(script_path), "--monitor"], check=True)
-        return True
-    except subprocess.CalledProcessError as e:
+        exec_script(script_path, "--monitor")
+    except OSError as e:
         print_status(RED, f"❌ Error monitoring: {e}")
         return False
 
@@ -399,20 +591,14 @@ def show_status():
     """Show current workflow status."""
     print_status(BLUE, "📈 Current workflow status...")
     
-    workflow_dir = Path.cwd()
-    
     # Show chunk status if available
-    chunk_status_file = workflow_dir / "data" / "chunk_status.csv"
-    if chunk_status_file.exists():
-        with open(chunk_status_file, 'r') as f:
-            reader = csv.DictReader(f)
-            chunks = list(reader)
-        
-        total_chunks = len(chunks)
-        pending = sum(1 for c in chunks if c['status'] == 'pending')
-        running = sum(1 for c in chunks if c['status'] == 'running')
-        completed = sum(1 for c in chunks if c['status'] == 'completed')
-        failed = sum(1 for c in chunks if c['status'] == 'failed')
+    counts = count_chunks_by_status()
+    if counts:
+        total_chunks = sum(counts.values())
+        pending = counts.get('pending', 0)
+        running = counts.get('running', 0)
+        completed = counts.get('completed', 0)
+        failed = counts.get('failed', 0)
         
         print_status(BLUE, "📦 Chunk Status:")
         print(f"  Total Chunks: {total_chunks}")
@@ -423,51 +609,47 @@ def show_status():
         print()
     
     # Show system resources
-    resource_manager = ResourceManager(workflow_dir)
+    resource_manager = get_resource_manager(WORKFLOW_DIR)
     print_status(BLUE, "🔍 System Resources:")
-    resources = resource_manager.get_current_resources()
+    resources = get_resources_cached(resource_manager)
     if resources:
         print(f"  Storage: {resources['storage']['usage_percent']:.1f}% used")
         print(f"  CPU: {resources['cpu']['usage_percent']:.1f}% used")
         print(f"  Memory: {resources['memory']['usage_percent']:.1f}% used")
     
     # Show general status
-    script_path = workflow_dir / "scripts" / "monitor.py"
-    if script_path.exists():
+    script_path = find_script("monitor.py")
+    if script_path is not None:
         try:
-            subprocess.run([sys.executable, str(script_path)], check=True)
-        except subprocess.CalledProcessError:
+            exec_script(script_path)
+        except OSError:
             pass
 
 def cleanup_storage():
     """Clean up storage."""
     print_status(BLUE, "🧹 Cleaning up storage...")
     
-    workflow_dir = Path.cwd()
-    script_path = workflow_dir / "scripts" / "cleanup.py"
+    script_path = find_script("cleanup.py")
     
-    if not script_path.exists():
+    if script_path is None:
         print_status(RED, "❌ Error: cleanup.py not found")
         return False
     
     try:
-        subprocess.run([sys.executable, str(script_path), "--cleanup"], check=True)
-        print_status(GREEN, "✅ Storage cleanup completed")
-        return True
-    except subprocess.CalledProcessError as e:
+        exec_script(script_path, "--cleanup")
+    except OSError as e:
         print_status(RED, f"❌ Error cleaning up: {e}")
         return False
 
 def show_resources():
     """Show detailed resource information."""
-    workflow_dir = Path.cwd()
-    resource_manager = ResourceManager(workflow_dir)
+    resource_manager = get_resource_manager(WORKFLOW_DIR)
     print(resource_manager.generate_advanced_report())
 
 def show_help():
     """Show help message."""
     print_status(BLUE, "🧬 STAR Alignment Workflow Controller")
-    print_status(BLUE, f"📁 Working directory: {Path.cwd()}")
+    print_status(BLUE, f"📁 Working directory: {WORKFLOW_DIR}")
     print()
     print("🧬 STAR Alignment Workflow Controller")
     print("=" * 50)
@@ -511,8 +693,7 @@ def show_storage_prediction():
     print_status(BLUE, "=" * 40)
     
     try:
-        workflow_dir = Path.cwd()
-        resource_manager = ResourceManager(workflow_dir)
+        resource_manager = get_resource_manager(WORKFLOW_DIR)
         
         # Get storage prediction
         result = resource_manager.predict_storage_failure()
@@ -544,8 +725,7 @@ def show_exhaustion_prediction():
     print_status(BLUE, "=" * 40)
     
     try:
-        workflow_dir = Path.cwd()
-        resource_manager = ResourceManager(workflow_dir)
+        resource_manager = get_resource_manager(WORKFLOW_DIR)
         
         # Get exhaustion prediction
         result = resource_manager.predict_resource_exhaustion()
@@ -587,8 +767,7 @@ def show_network_topology():
     print_status(BLUE, "=" * 40)
     
     try:
-        workflow_dir = Path.cwd()
-        resource_manager = ResourceManager(workflow_dir)
+        resource_manager = get_resource_manager(WORKFLOW_DIR)
         
         # Get network topology
         result = resource_manager.get_network_topology()
@@ -630,8 +809,7 @@ def show_hpc_info():
     print_status(BLUE, "=" * 40)
     
     try:
-        workflow_dir = Path.cwd()
-        resource_manager = ResourceManager(workflow_dir)
+        resource_manager = get_resource_manager(WORKFLOW_DIR)
         
         # Get HPC system info
         result = resource_manager.get_hpc_system_info()
@@ -686,7 +864,8 @@ def main():
     # Execute commands
     if args.command == 'init':
         chunk_size = int(args.arg) if args.arg else None
-        if create_manifest() and create_chunks(chunk_size):
+        total_samples = create_manifest()
+        if total_samples is not None and create_chunks(chunk_size, total_samples):
             print_status(GREEN, "🎉 Workflow initialized successfully!")
             print_status(BLUE, "💡 Next steps:")
             print_status(BLUE, "  1. python3 run.py status")
@@ -5,28 +5,250 @@ Storage failure prediction, resource exhaustion prediction, and network topology
 """
 
 import os
+import sys
 import json
+import shutil
+import re
 import subprocess
-import psutil
 import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta
 from collections import deque
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import threading
 import time
 import logging
 from typing import Dict, List, Optional, Tuple
 import socket
-import platform
+
+try:
+    import orjson  # Optional: faster JSON output for the test CLI
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Kernel log messages counted as disk errors
+_DISK_ERROR_PATTERN = re.compile(rb"I/O error|disk error")
+
+# IO errors per hour are counted over this trailing window, not extrapolated from one sample
+_IO_ERROR_WINDOW_SECONDS = 3600
+
+# Storage preventive measures by risk level
+_PREVENTIVE_MEASURES = {
+    "CRITICAL": (
+        "🚨 CRITICAL: Immediate storage cleanup required",
+        "🚨 CRITICAL: Request storage expansion immediately",
+        "🚨 CRITICAL: Stop new job submissions",
+        "🚨 CRITICAL: Archive old data to external storage"
+    ),
+    "HIGH": (
+        "⚠️  HIGH RISK: Clean up temporary files",
+        "⚠️  HIGH RISK: Compress old BAM files",
+        "⚠️  HIGH RISK: Request additional storage",
+        "⚠️  HIGH RISK: Monitor storage usage closely"
+    ),
+    "MODERATE": (
+        "📊 MODERATE RISK: Regular cleanup schedule",
+        "📊 MODERATE RISK: Monitor growth rate",
+        "📊 MODERATE RISK: Plan storage expansion"
+    ),
+    "LOW": (
+        "✅ LOW RISK: Continue normal operations",
+        "✅ LOW RISK: Regular monitoring sufficient"
+    )
+}
+
+# Storage recommendations for time to failure below 24 hours, 1 week, 1 month, and beyond
+_TIME_TO_FAILURE_HOURS = (24, 168, 720)
+_TIME_TO_FAILURE_RECOMMENDATIONS = (
+    ("🚨 URGENT: Storage will fail within 24 hours",
+     "🚨 URGENT: Implement emergency cleanup procedures"),
+    ("⚠️  WARNING: Storage will fail within 1 week",
+     "⚠️  WARNING: Plan storage expansion immediately"),
+    ("📊 NOTICE: Storage will fail within 1 month",
+     "📊 NOTICE: Schedule storage maintenance"),
+    ("✅ OK: Storage stable for extended period",)
+)
+
+# Resource exhaustion recommendations by overall risk level
+_EXHAUSTION_RECOMMENDATIONS = {
+    "CRITICAL": (
+        "🚨 CRITICAL: Immediate resource management required",
+        "🚨 CRITICAL: Reduce job concurrency",
+        "🚨 CRITICAL: Implement emergency resource allocation",
+        "🚨 CRITICAL: Contact system administrators"
+    ),
+    "HIGH": (
+        "⚠️  HIGH RISK: Optimize resource allocation",
+        "⚠️  HIGH RISK: Reduce job queue size",
+        "⚠️  HIGH RISK: Monitor resource usage closely",
+        "⚠️  HIGH RISK: Plan resource expansion"
+    ),
+    "MODERATE": (
+        "📊 MODERATE RISK: Continue monitoring",
+        "📊 MODERATE RISK: Optimize job scheduling",
+        "📊 MODERATE RISK: Plan resource management"
+    ),
+    "UNKNOWN": (
+        "❓ UNKNOWN RISK: Check system status",
+        "❓ UNKNOWN RISK: Verify resource data"
+    ),
+    "LOW": (
+        "✅ LOW RISK: Normal operations",
+        "✅ LOW RISK: Regular monitoring sufficient"
+    )
+}
+
+# Per-resource optimization suggestions, given when exhaustion probability exceeds the cutoff
+_SUGGESTION_PROBABILITY = 0.3
+_RESOURCE_SUGGESTIONS = (
+    ("cpu", "🖥️  CPU: Reduce job concurrency or increase CPU allocation"),
+    ("memory", "🧠 Memory: Optimize memory usage or increase memory allocation"),
+    ("storage", "💾 Storage: Clean up temporary files or expand storage")
+)
+
+# Shared pool for running the per-resource exhaustion predictors, see _get_prediction_executor()
+_prediction_executor = None
+_prediction_executor_lock = threading.Lock()
+
+def _get_prediction_executor() -> ThreadPoolExecutor:
+    """Return the module-wide prediction thread pool, creating it on first use"""
+    global _prediction_executor
+    with _prediction_executor_lock:
+        if _prediction_executor is None:
+            _prediction_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="predict")
+        return _prediction_executor
+
+# Risk levels in increasing order of severity
+RISK_LEVELS = ("UNKNOWN", "LOW", "MODERATE", "HIGH", "CRITICAL")
+_RISK_SCORES = {level: score for score, level in enumerate(RISK_LEVELS)}
+
+# Probability cutoffs (strictly exceeded) for LOW -> MODERATE -> HIGH -> CRITICAL
+_RISK_BINS = (0.2, 0.5, 0.8)
+_RISK_BY_BIN = RISK_LEVELS[1:]
+
+def _exhaustion_time(usage: float, horizon_hours: float) -> float:
+    """Hours until usage reaches 95%, projecting the remaining capacity linearly over horizon_hours"""
+    remaining_capacity = 0.95 - usage
+    if remaining_capacity <= 0:
+        return 0.1  # Already critical
+    return max(0.1, remaining_capacity * horizon_hours)
+
+def _coerce_number(value, default, cast=float, lo=None, hi=None):
+    """Convert a number or numeric string with cast and clamp it to [lo, hi]; default if invalid"""
+    try:
+        value = cast(value)
+    except (ValueError, TypeError, OverflowError):
+        value = cast(default)
+    if lo is not None:
+        value = max(lo, value)
+    if hi is not None:
+        value = min(hi, value)
+    return value
+
+# Exhaustion probability tables: entry i applies when usage exceeds i of the
+# (ascending) thresholds passed alongside them to _exhaustion_probability
+_CPU_EXHAUSTION_PROBS = (0.0, 0.1, 0.4, 0.8)
+_MEMORY_EXHAUSTION_PROBS = (0.0, 0.2, 0.5, 0.9)
+_STORAGE_EXHAUSTION_PROBS = (0.0, 0.3, 0.7, 0.95)
+_QUEUE_EXHAUSTION_PROBS = (0.0, 0.1, 0.4, 0.8)
+_USAGE_FAILURE_PROBS = (0.0, 0.3, 0.7)
+
+def _make_failure_probability(thresholds: Dict[str, float]):
+    """Build a failure probability function with the storage thresholds bound in"""
+    usage_bounds = (thresholds["usage_warning"], thresholds["usage_critical"])
+    growth_rate_critical = thresholds["growth_rate_critical"]
+    io_error_threshold = thresholds["io_error_threshold"]
+    
+    def failure_probability(usage: float, growth_rate: float, io_errors: float) -> float:
+        """Storage failure probability from usage, growth rate and IO error rate"""
+        probability = _USAGE_FAILURE_PROBS[bisect_left(usage_bounds, usage)]
+        probability += 0.4 * (growth_rate > growth_rate_critical)
+        probability += 0.2 * (io_errors > io_error_threshold)
+        return min(probability, 1.0)
+    
+    return failure_probability
+
+def _exhaustion_probability(usage: float, thresholds: Tuple[float, ...],
+                            probabilities: Tuple[float, ...]) -> float:
+    """Exhaustion probability for usage given ascending thresholds (strictly exceeded)"""
+    return probabilities[bisect_left(thresholds, usage)]
+
+_NFS_FSTYPES = ("nfs", "nfs4")
+
+# Hostname fragments that mark a compute node, and job ID variables by scheduler
+_COMPUTE_NODE_PATTERN = re.compile(r"node|compute|worker", re.IGNORECASE)
+_SCHEDULER_JOB_VARS = {"SLURM_JOB_ID": "SLURM", "PBS_JOBID": "PBS", "LSB_JOBID": "LSB"}
+
+def _hex_to_ipv4(value: str) -> str:
+    """Convert a little-endian hex address from /proc/net/route to dotted form"""
+    return socket.inet_ntoa(bytes.fromhex(value)[::-1])
+
+def _executables_on_path() -> set:
+    """Names of all executable files in the PATH directories"""
+    available = set()
+    for directory in os.environ.get("PATH", os.defpath).split(os.pathsep):
+        try:
+            with os.scandir(directory or ".") as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file() and entry.stat().st_mode & 0o111:
+                            available.add(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return available
+
+class UsageHistory:
+    """Fixed-size ring buffer of timestamped usage samples, one column per resource"""
+    
+    def __init__(self, columns: List[str], size: int = 1000, dtype=np.float32):
+        self.columns = list(columns)
+        self.size = size
+        self.dtype = dtype
+        self._values = None  # Buffers are allocated on the first append
+        self._times = None
+        self._count = 0  # Samples appended so far
+        
+    def __len__(self) -> int:
+        return min(self._count, self.size)
+        
+    def append(self, row, timestamp: Optional[float] = None):
+        """Add one sample (values in column order)"""
+        if self._values is None:
+            self._values = np.zeros((self.size, len(self.columns)), dtype=self.dtype)
+            self._times = np.zeros(self.size, dtype=np.float64)
+        idx = self._count % self.size
+        self._values[idx] = row
+        self._times[idx] = time.time() if timestamp is None else timestamp
+        self._count += 1
+        
+    def samples(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (times, values) oldest first"""
+        if self._values is None:
+            return np.zeros(0), np.zeros((0, len(self.columns)), dtype=self.dtype)
+        if self._count <= self.size:
+            return self._times[:self._count], self._values[:self._count]
+        start = self._count % self.size
+        return np.roll(self._times, -start), np.roll(self._values, -start, axis=0)
+        
+    def growth_rates(self) -> np.ndarray:
+        """Least-squares growth per hour of every column over the buffered samples"""
+        times, values = self.samples()
+        if len(times) < 2 or times[-1] <= times[0]:
+            return np.zeros(len(self.columns))
+        hours = (times - times[0]) / 3600
+        return np.polyfit(hours, values.astype(np.float64), 1)[0]
+
 class StorageFailurePredictor:
     """Predict storage failures and provide preventive measures"""
     
     def __init__(self, config: Dict):
         self.config = config
-        self.storage_history = deque(maxlen=1000)
+        self.storage_history = UsageHistory(["usage"])
         self.failure_thresholds = {
             "usage_critical": 0.95,
             "usage_warning": 0.90,
@@ -34,28 +256,40 @@ class StorageFailurePredictor:
             "io_error_threshold": 5,      # 5 IO errors per hour
             "disk_health_warning": 0.8     # 80% disk health
         }
+        self._failure_probability = _make_failure_probability(self.failure_thresholds)
+        
+        # smartctl and the kernel log are slow to query, so their results are reused for a while
+        self.probe_cache_ttl = self.config.get("storage_probe_cache_ttl", 300)  # seconds
+        self._probe_cache = {}  # probe name -> (monotonic timestamp, value)
+        self._probe_lock = threading.Lock()
+        self._smart_thread = None
+        
+        # Resolve disk tools once; missing tools are skipped instead of attempted every call
+        self._smartctl_path = shutil.which("smartctl")
+        self._dmesg_path = shutil.which("dmesg")
+        
+        # Per-device IO errors in the last hour, kept current by a background sampler
+        self.io_sample_interval = max(1, self.config.get("io_error_sample_interval", 60))  # seconds
+        baseline = self._read_io_error_counts()
+        self._io_err_rate = dict.fromkeys(baseline, 0)
+        self._stop_sampling = threading.Event()
+        self._io_thread = None
+        if baseline:
+            self._io_thread = threading.Thread(target=self._sample_io_errors, args=(baseline,), daemon=True)
+            self._io_thread.start()
+            
+    def stop_sampling(self, timeout: float = 5):
+        """Stop the background IO error sampler"""
+        self._stop_sampling.set()
+        if self._io_thread is not None:
+            self._io_thread.join(timeout)
         
     def predict_storage_failure(self, current_usage: float, growth_rate: float = 0.0) -> Dict:
         """Predict storage failure probability and timeline"""
         try:
             # Validate and convert inputs
-            try:
-                if isinstance(current_usage, str):
-                    current_usage = float(current_usage)
-                elif not isinstance(current_usage, (int, float)):
-                    current_usage = 0.0
-                current_usage = max(0.0, min(1.0, float(current_usage)))  # Clamp to 0-1
-            except (ValueError, TypeError):
-                current_usage = 0.0
-            
-            try:
-                if isinstance(growth_rate, str):
-                    growth_rate = float(growth_rate)
-                elif not isinstance(growth_rate, (int, float)):
-                    growth_rate = 0.0
-                growth_rate = max(0.0, float(growth_rate))  # Ensure non-negative
-            except (ValueError, TypeError):
-                growth_rate = 0.0
+            current_usage = _coerce_number(current_usage, 0.0, lo=0.0, hi=1.0)  # Clamp to 0-1
+            growth_rate = _coerce_number(growth_rate, 0.0, lo=0.0)  # Ensure non-negative
             
             # Calculate failure probability
             failure_probability = self._calculate_failure_probability(current_usage, growth_rate)
@@ -69,16 +303,20 @@ class StorageFailurePredictor:
             # Check disk health
             disk_health = self._check_disk_health()
             
+            # Track usage across predictions to measure the actual growth rate
+            self.storage_history.append([current_usage])
+            
             return {
                 "failure_probability": failure_probability,
                 "time_to_failure_hours": time_to_failure,
                 "risk_level": self._get_risk_level(failure_probability),
                 "preventive_measures": preventive_measures,
                 "disk_health": disk_health,
+                "observed_growth_rate": float(self.storage_history.growth_rates()[0]),
                 "recommendations": self._get_recommendations(failure_probability, time_to_failure)
             }
         except Exception as e:
-            logger.error(f"Error in predict_storage_failure: {e}")
+            logger.error("Error in predict_storage_failure: %s", e)
             return {
                 "error": str(e),
                 "failure_probability": 0.0,
@@ -91,24 +329,7 @@ class StorageFailurePredictor:
         
     def _calculate_failure_probability(self, usage: float, growth_rate: float) -> float:
         """Calculate storage failure probability"""
-        base_probability = 0.0
-        
-        # Usage-based probability
-        if usage > self.failure_thresholds["usage_critical"]:
-            base_probability += 0.7
-        elif usage > self.failure_thresholds["usage_warning"]:
-            base_probability += 0.3
-            
-        # Growth rate-based probability
-        if growth_rate > self.failure_thresholds["growth_rate_critical"]:
-            base_probability += 0.4
-            
-        # IO error-based probability
-        io_errors = self._get_io_error_rate()
-        if io_errors > self.failure_thresholds["io_error_threshold"]:
-            base_probability += 0.2
-            
-        return min(base_probability, 1.0)
+        return self._failure_probability(usage, growth_rate, self._get_io_error_rate())
         
     def _estimate_time_to_failure(self, usage: float, growth_rate: float) -> float:
         """Estimate time to storage failure in hours"""
@@ -127,41 +348,58 @@ class StorageFailurePredictor:
         
     def _get_preventive_measures(self, usage: float, failure_prob: float) -> List[str]:
         """Get preventive measures based on current state"""
-        measures = []
-        
-        if failure_prob > 0.8:
-            measures.extend([
-                "🚨 CRITICAL: Immediate storage cleanup required",
-                "🚨 CRITICAL: Request storage expansion immediately",
-                "🚨 CRITICAL: Stop new job submissions",
-                "🚨 CRITICAL: Archive old data to external storage"
-            ])
-        elif failure_prob > 0.5:
-            measures.extend([
-                "⚠️  HIGH RISK: Clean up temporary files",
-                "⚠️  HIGH RISK: Compress old BAM files",
-                "⚠️  HIGH RISK: Request additional storage",
-                "⚠️  HIGH RISK: Monitor storage usage closely"
-            ])
-        elif failure_prob > 0.2:
-            measures.extend([
-                "📊 MODERATE RISK: Regular cleanup schedule",
-                "📊 MODERATE RISK: Monitor growth rate",
-                "📊 MODERATE RISK: Plan storage expansion"
-            ])
-        else:
-            measures.extend([
-                "✅ LOW RISK: Continue normal operations",
-                "✅ LOW RISK: Regular monitoring sufficient"
-            ])
-            
-        return measures
+        return list(_PREVENTIVE_MEASURES[self._get_risk_level(failure_prob)])
+        
+    def _cached_probe(self, name: str, probe):
+        """Return probe(), reusing the previous result for probe_cache_ttl seconds"""
+        with self._probe_lock:
+            cached = self._probe_cache.get(name)
+        if cached and time.monotonic() - cached[0] < self.probe_cache_ttl:
+            return cached[1]
+        
+        value = probe()
+        with self._probe_lock:
+            self._probe_cache[name] = (time.monotonic(), value)
+        return value
         
     def _check_disk_health(self) -> Dict:
         """Check disk health using system tools"""
+        health_status = self._get_smart_status()
+            
+        # Check for disk errors in system logs
+        disk_errors = self._cached_probe("dmesg", self._count_kernel_disk_errors)
+            
+        return {
+            "status": health_status,
+            "recent_errors": disk_errors,
+            "health_score": max(0, 1.0 - (disk_errors * 0.1))
+        }
+        
+    def _get_smart_status(self) -> str:
+        """Get the smartctl health status, refreshed in a background thread"""
+        if self._smartctl_path is None:
+            return "unknown"
+            
+        with self._probe_lock:
+            cached = self._probe_cache.get("smart")
+            stale = cached is None or time.monotonic() - cached[0] >= self.probe_cache_ttl
+            if stale and (self._smart_thread is None or not self._smart_thread.is_alive()):
+                self._smart_thread = threading.Thread(target=self._refresh_smart_status, daemon=True)
+                self._smart_thread.start()
+            smart_thread = self._smart_thread
+            
+        if cached is None:
+            # Nothing to report yet: wait for the first check (smartctl's own timeout bounds this)
+            smart_thread.join()
+            with self._probe_lock:
+                cached = self._probe_cache.get("smart")
+        return cached[1] if cached else "unknown"
+        
+    def _refresh_smart_status(self):
+        """Run smartctl and store its health status in the probe cache"""
         try:
             # Check disk health using smartctl if available
-            result = subprocess.run(['smartctl', '-H', '/dev/sda'], 
+            result = subprocess.run([self._smartctl_path, '-H', '/dev/sda'], 
                                   capture_output=True, text=True, timeout=10)
             if result.returncode == 0:
                 health_status = "healthy" if "PASSED" in result.stdout else "warning"
@@ -170,70 +408,83 @@ class StorageFailurePredictor:
         except (subprocess.TimeoutExpired, FileNotFoundError):
             health_status = "unknown"
             
-        # Check for disk errors in system logs
+        with self._probe_lock:
+            self._probe_cache["smart"] = (time.monotonic(), health_status)
+        
+    def _count_kernel_disk_errors(self) -> int:
+        """Count disk errors reported in the kernel log"""
         try:
-            result = subprocess.run(['dmesg'], capture_output=True, text=True, timeout=5)
-            disk_errors = result.stdout.count('I/O error') + result.stdout.count('disk error')
-        except:
-            disk_errors = 0
+            return len(_DISK_ERROR_PATTERN.findall(self._read_kernel_log()))
+        except (OSError, subprocess.SubprocessError):
+            return 0
+        
+    def _read_kernel_log(self) -> bytes:
+        """Read the kernel log, from /dev/kmsg when permitted (no dmesg fork)"""
+        try:
+            fd = os.open("/dev/kmsg", os.O_RDONLY | os.O_NONBLOCK)
+        except OSError:
+            if self._dmesg_path is None:
+                return b""
+            result = subprocess.run([self._dmesg_path], capture_output=True, timeout=5)
+            return result.stdout
             
-        return {
-            "status": health_status,
-            "recent_errors": disk_errors,
-            "health_score": max(0, 1.0 - (disk_errors * 0.1))
-        }
+        records = []
+        try:
+            while True:
+                try:
+                    records.append(os.read(fd, 8192))  # One log record per read
+                except BrokenPipeError:
+                    continue  # Records were overwritten while reading; resume at the next one
+                except BlockingIOError:
+                    break  # End of buffer
+        finally:
+            os.close(fd)
+        return b"".join(records)
         
     def _get_io_error_rate(self) -> int:
-        """Get current IO error rate"""
-        try:
-            result = subprocess.run(['iostat', '-x', '1', '1'], 
-                                  capture_output=True, text=True, timeout=10)
-            # Parse iostat output for error rates
-            lines = result.stdout.split('\n')
-            for line in lines:
-                if 'sda' in line or 'nvme' in line:
-                    parts = line.split()
-                    if len(parts) > 10:
-                        return int(parts[9])  # Error count
-        except:
-            pass
-        return 0
+        """Get current IO error rate (errors per hour, 0 without kernel error counters)"""
+        return sum(self._io_err_rate.values())
+        
+    def _read_io_error_counts(self) -> Dict[str, int]:
+        """Read cumulative IO error counters per block device from sysfs"""
+        counts = {}
+        for counter in Path("/sys/block").glob("*/device/ioerr_cnt"):
+            try:
+                counts[counter.parent.parent.name] = int(counter.read_text().strip(), 0)
+            except (OSError, ValueError):
+                continue
+        return counts
+        
+    def _sample_io_errors(self, baseline: Dict[str, int]):
+        """Background loop: count IO errors per device over the trailing hour"""
+        samples = deque([(time.monotonic(), baseline)])
+        while not self._stop_sampling.wait(self.io_sample_interval):
+            current = self._read_io_error_counts()
+            now = time.monotonic()
+            samples.append((now, current))
+            # Keep the newest sample taken at or before the window start as the reference
+            while len(samples) > 1 and samples[1][0] <= now - _IO_ERROR_WINDOW_SECONDS:
+                samples.popleft()
+            oldest = samples[0][1]
+            self._io_err_rate = {
+                device: max(0, count - oldest.get(device, count))
+                for device, count in current.items()
+            }
         
     def _get_risk_level(self, failure_prob: float) -> str:
         """Get risk level based on failure probability"""
-        if failure_prob > 0.8:
-            return "CRITICAL"
-        elif failure_prob > 0.5:
-            return "HIGH"
-        elif failure_prob > 0.2:
-            return "MODERATE"
-        else:
-            return "LOW"
+        return _RISK_BY_BIN[bisect_left(_RISK_BINS, failure_prob)]
             
     def _get_recommendations(self, failure_prob: float, time_to_failure: float) -> List[str]:
         """Get specific recommendations"""
-        recommendations = []
-        
-        if time_to_failure < 24:  # Less than 24 hours
-            recommendations.append("🚨 URGENT: Storage will fail within 24 hours")
-            recommendations.append("🚨 URGENT: Implement emergency cleanup procedures")
-        elif time_to_failure < 168:  # Less than 1 week
-            recommendations.append("⚠️  WARNING: Storage will fail within 1 week")
-            recommendations.append("⚠️  WARNING: Plan storage expansion immediately")
-        elif time_to_failure < 720:  # Less than 1 month
-            recommendations.append("📊 NOTICE: Storage will fail within 1 month")
-            recommendations.append("📊 NOTICE: Schedule storage maintenance")
-        else:
-            recommendations.append("✅ OK: Storage stable for extended period")
-            
-        return recommendations
+        return list(_TIME_TO_FAILURE_RECOMMENDATIONS[bisect_right(_TIME_TO_FAILURE_HOURS, time_to_failure)])
 
 class ResourceExhaustionPredictor:
     """Predict resource exhaustion and provide optimization recommendations"""
     
     def __init__(self, config: Dict):
         self.config = config
-        self.resource_history = deque(maxlen=1000)
+        self.resource_history = UsageHistory(["cpu", "memory", "storage", "queues"])
         self.exhaustion_thresholds = {
             "cpu_critical": 0.95,
             "memory_critical": 0.95,
@@ -242,6 +493,14 @@ class ResourceExhaustionPredictor:
             "growth_rate_critical": 0.1
         }
         
+        # Ascending threshold tuples for the hot path (thresholds are fixed after init)
+        thresholds = self.exhaustion_thresholds
+        self._cpu_thresholds = (0.6, 0.8, thresholds["cpu_critical"])
+        self._memory_thresholds = (0.6, 0.8, thresholds["memory_critical"])
+        self._storage_thresholds = (0.8, 0.9, thresholds["storage_critical"])
+        self._queue_thresholds = (0.6, 0.8, thresholds["queue_critical"])
+        self._growth_rate_critical = thresholds["growth_rate_critical"]
+        
     def predict_resource_exhaustion(self, current_resources: Dict) -> Dict:
         """Predict resource exhaustion across all resource types"""
         
@@ -265,31 +524,23 @@ class ResourceExhaustionPredictor:
                     "optimization_suggestions": []
                 }
             
-            predictions = {}
-            
-            # CPU exhaustion prediction
-            if "cpu" in current_resources and current_resources["cpu"] is not None:
-                predictions["cpu"] = self._predict_cpu_exhaustion(current_resources["cpu"])
-            else:
-                predictions["cpu"] = {"error": "CPU data not available"}
-            
-            # Memory exhaustion prediction
-            if "memory" in current_resources and current_resources["memory"] is not None:
-                predictions["memory"] = self._predict_memory_exhaustion(current_resources["memory"])
-            else:
-                predictions["memory"] = {"error": "Memory data not available"}
-            
-            # Storage exhaustion prediction
-            if "storage" in current_resources and current_resources["storage"] is not None:
-                predictions["storage"] = self._predict_storage_exhaustion(current_resources["storage"])
-            else:
-                predictions["storage"] = {"error": "Storage data not available"}
-            
-            # Queue exhaustion prediction
-            if "lsf" in current_resources and current_resources["lsf"] is not None:
-                predictions["queues"] = self._predict_queue_exhaustion(current_resources["lsf"])
-            else:
-                predictions["queues"] = {"error": "Queue data not available"}
+            # Run the per-resource predictors concurrently
+            predictors = [
+                ("cpu", "cpu", self._predict_cpu_exhaustion, "CPU data not available"),
+                ("memory", "memory", self._predict_memory_exhaustion, "Memory data not available"),
+                ("storage", "storage", self._predict_storage_exhaustion, "Storage data not available"),
+                ("queues", "lsf", self._predict_queue_exhaustion, "Queue data not available")
+            ]
+            executor = _get_prediction_executor()
+            futures = {
+                name: executor.submit(predict, current_resources[source])
+                for name, source, predict, _ in predictors
+                if current_resources.get(source) is not None
+            }
+            predictions = {
+                name: futures[name].result() if name in futures else {"error": missing}
+                for name, _, _, missing in predictors
+            }
             
             # Overall risk assessment
             overall_risk = self._assess_overall_risk(predictions)
@@ -297,11 +548,12 @@ class ResourceExhaustionPredictor:
             return {
                 "predictions": predictions,
                 "overall_risk": overall_risk,
+                "usage_trends": self._record_usage_trends(predictions),
                 "recommendations": self._get_exhaustion_recommendations(predictions, overall_risk),
                 "optimization_suggestions": self._get_optimization_suggestions(predictions)
             }
         except Exception as e:
-            logger.error(f"Error in predict_resource_exhaustion: {e}")
+            logger.error("Error in predict_resource_exhaustion: %s", e)
             return {
                 "error": str(e),
                 "predictions": {},
@@ -310,6 +562,23 @@ class ResourceExhaustionPredictor:
                 "optimization_suggestions": []
             }
         
+    def _record_usage_trends(self, predictions: Dict) -> Dict:
+        """Add current usage to the history and report growth rates across it"""
+        usage = [predictions[resource].get("current_usage") for resource in ("cpu", "memory", "storage")]
+        if None not in usage:  # Only record complete samples
+            queue_usage = [q.get("utilization", 0.0) for q in predictions["queues"].values()
+                           if isinstance(q, dict)]
+            self.resource_history.append(usage + [max(queue_usage, default=0.0)])
+        
+        # One vectorized pass over all resources
+        rates = self.resource_history.growth_rates()
+        rising = np.flatnonzero(rates > self._growth_rate_critical)
+        return {
+            "samples": len(self.resource_history),
+            "growth_per_hour": dict(zip(self.resource_history.columns, rates.tolist())),
+            "rapidly_growing": [self.resource_history.columns[i] for i in rising]
+        }
+        
     def _predict_cpu_exhaustion(self, cpu_info: Dict) -> Dict:
         """Predict CPU resource exhaustion"""
         try:
@@ -325,40 +594,17 @@ class ResourceExhaustionPredictor:
                 }
             
             # Safely extract values with type validation
-            usage_percent = cpu_info.get("usage_percent", 0)
-            available = cpu_info.get("available", 1)
-            
-            # Validate and convert usage_percent
-            try:
-                if isinstance(usage_percent, str):
-                    usage_percent = float(usage_percent)
-                elif not isinstance(usage_percent, (int, float)):
-                    usage_percent = 0
-                usage = max(0, min(100, usage_percent)) / 100  # Clamp to 0-100%
-            except (ValueError, TypeError):
-                usage = 0
-            
-            # Validate and convert available
-            try:
-                if isinstance(available, str):
-                    available = int(available)
-                elif not isinstance(available, (int, float)):
-                    available = 1
-                available = max(0, int(available))
-            except (ValueError, TypeError):
-                available = 1
-            
+            usage = _coerce_number(cpu_info.get("usage_percent", 0), 0, lo=0, hi=100) / 100  # Clamp to 0-100%
+            available = _coerce_number(cpu_info.get("available", 1), 1, cast=int, lo=0)
+                
             # Calculate exhaustion probability
-            exhaustion_prob = 0.0
-            if usage > self.exhaustion_thresholds["cpu_critical"]:
-                exhaustion_prob = 0.8
-            elif usage > 0.8:
-                exhaustion_prob = 0.4
-            elif usage > 0.6:
-                exhaustion_prob = 0.1
+            exhaustion_prob = _exhaustion_probability(usage, self._cpu_thresholds, _CPU_EXHAUSTION_PROBS)
                 
             # Estimate time to exhaustion
-            time_to_exhaustion = self._estimate_cpu_exhaustion_time(usage, available)
+            if available <= 0 and usage < 0.95:
+                time_to_exhaustion = 0.5  # No available cores
+            else:
+                time_to_exhaustion = _exhaustion_time(usage, 24)
             
             return {
                 "exhaustion_probability": exhaustion_prob,
@@ -368,7 +614,7 @@ class ResourceExhaustionPredictor:
                 "risk_level": self._get_risk_level(exhaustion_prob)
             }
         except Exception as e:
-            logger.error(f"Error in _predict_cpu_exhaustion: {e}")
+            logger.error("Error in _predict_cpu_exhaustion: %s", e)
             return {
                 "error": str(e),
                 "exhaustion_probability": 0.0,
@@ -393,40 +639,14 @@ class ResourceExhaustionPredictor:
                 }
             
             # Safely extract values with type validation
-            usage_percent = memory_info.get("usage_percent", 0)
-            available_gb = memory_info.get("available_gb", 1)
-            
-            # Validate and convert usage_percent
-            try:
-                if isinstance(usage_percent, str):
-                    usage_percent = float(usage_percent)
-                elif not isinstance(usage_percent, (int, float)):
-                    usage_percent = 0
-                usage = max(0, min(100, usage_percent)) / 100  # Clamp to 0-100%
-            except (ValueError, TypeError):
-                usage = 0
-            
-            # Validate and convert available_gb
-            try:
-                if isinstance(available_gb, str):
-                    available_gb = float(available_gb)
-                elif not isinstance(available_gb, (int, float)):
-                    available_gb = 1
-                available_gb = max(0, float(available_gb))
-            except (ValueError, TypeError):
-                available_gb = 1
+            usage = _coerce_number(memory_info.get("usage_percent", 0), 0, lo=0, hi=100) / 100  # Clamp to 0-100%
+            available_gb = _coerce_number(memory_info.get("available_gb", 1), 1, lo=0)
         
             # Calculate exhaustion probability
-            exhaustion_prob = 0.0
-            if usage > self.exhaustion_thresholds["memory_critical"]:
-                exhaustion_prob = 0.9
-            elif usage > 0.8:
-                exhaustion_prob = 0.5
-            elif usage > 0.6:
-                exhaustion_prob = 0.2
+            exhaustion_prob = _exhaustion_probability(usage, self._memory_thresholds, _MEMORY_EXHAUSTION_PROBS)
                 
             # Estimate time to exhaustion
-            time_to_exhaustion = self._estimate_memory_exhaustion_time(usage, available_gb)
+            time_to_exhaustion = _exhaustion_time(usage, 48)
             
             return {
                 "exhaustion_probability": exhaustion_prob,
@@ -436,7 +656,7 @@ class ResourceExhaustionPredictor:
                 "risk_level": self._get_risk_level(exhaustion_prob)
             }
         except Exception as e:
-            logger.error(f"Error in _predict_memory_exhaustion: {e}")
+            logger.error("Error in _predict_memory_exhaustion: %s", e)
             return {
                 "error": str(e),
                 "exhaustion_probability": 0.0,
@@ -461,40 +681,14 @@ class ResourceExhaustionPredictor:
                 }
             
             # Safely extract values with type validation
-            usage_percent = storage_info.get("usage_percent", 0)
-            free_gb = storage_info.get("free_gb", 1)
-            
-            # Validate and convert usage_percent
-            try:
-                if isinstance(usage_percent, str):
-                    usage_percent = float(usage_percent)
-                elif not isinstance(usage_percent, (int, float)):
-                    usage_percent = 0
-                usage = max(0, min(100, usage_percent)) / 100  # Clamp to 0-100%
-            except (ValueError, TypeError):
-                usage = 0
-            
-            # Validate and convert free_gb
-            try:
-                if isinstance(free_gb, str):
-                    free_gb = float(free_gb)
-                elif not isinstance(free_gb, (int, float)):
-                    free_gb = 1
-                free_gb = max(0, float(free_gb))
-            except (ValueError, TypeError):
-                free_gb = 1
+            usage = _coerce_number(storage_info.get("usage_percent", 0), 0, lo=0, hi=100) / 100  # Clamp to 0-100%
+            free_gb = _coerce_number(storage_info.get("free_gb", 1), 1, lo=0)
         
             # Calculate exhaustion probability
-            exhaustion_prob = 0.0
-            if usage > self.exhaustion_thresholds["storage_critical"]:
-                exhaustion_prob = 0.95
-            elif usage > 0.9:
-                exhaustion_prob = 0.7
-            elif usage > 0.8:
-                exhaustion_prob = 0.3
+            exhaustion_prob = _exhaustion_probability(usage, self._storage_thresholds, _STORAGE_EXHAUSTION_PROBS)
                 
             # Estimate time to exhaustion
-            time_to_exhaustion = self._estimate_storage_exhaustion_time(usage, free_gb)
+            time_to_exhaustion = _exhaustion_time(usage, 168)
             
             return {
                 "exhaustion_probability": exhaustion_prob,
@@ -504,7 +698,7 @@ class ResourceExhaustionPredictor:
                 "risk_level": self._get_risk_level(exhaustion_prob)
             }
         except Exception as e:
-            logger.error(f"Error in _predict_storage_exhaustion: {e}")
+            logger.error("Error in _predict_storage_exhaustion: %s", e)
             return {
                 "error": str(e),
                 "exhaustion_probability": 0.0,
@@ -522,108 +716,47 @@ class ResourceExhaustionPredictor:
                 return {"error": "Invalid queue data format"}
             
             queue_exhaustion = {}
+            names = []
+            counts = []
             
             for queue_name, queue_data in queue_info.items():
-                try:
-                    # Validate queue data
-                    if queue_data is None or not isinstance(queue_data, dict):
-                        queue_exhaustion[queue_name] = {"error": "Invalid queue data"}
-                        continue
-                    
-                    # Safely extract values with defaults
-                    pending = queue_data.get("pending", 0)
-                    running = queue_data.get("running", 0)
-                    max_jobs = queue_data.get("max_jobs", 100)
-                    
-                    # Validate and convert values
-                    try:
-                        pending = int(pending) if isinstance(pending, (int, str)) else 0
-                        running = int(running) if isinstance(running, (int, str)) else 0
-                        max_jobs = int(max_jobs) if isinstance(max_jobs, (int, str)) else 100
-                    except (ValueError, TypeError):
-                        pending = running = 0
-                        max_jobs = 100
-                    
-                    # Ensure non-negative values
-                    pending = max(0, pending)
-                    running = max(0, running)
-                    max_jobs = max(1, max_jobs)  # At least 1 to avoid division by zero
-                    
-                    # Calculate queue utilization
-                    utilization = (running + pending) / max_jobs
-                    
-                    # Calculate exhaustion probability
-                    exhaustion_prob = 0.0
-                    if utilization > self.exhaustion_thresholds["queue_critical"]:
-                        exhaustion_prob = 0.8
-                    elif utilization > 0.8:
-                        exhaustion_prob = 0.4
-                    elif utilization > 0.6:
-                        exhaustion_prob = 0.1
-                        
+                # Validate queue data
+                if queue_data is None or not isinstance(queue_data, dict):
+                    queue_exhaustion[queue_name] = {"error": "Invalid queue data"}
+                    continue
+                
+                # Safely extract values with defaults (max_jobs at least 1 to avoid division by zero)
+                names.append(queue_name)
+                counts.append((
+                    _coerce_number(queue_data.get("pending", 0), 0, cast=int, lo=0),
+                    _coerce_number(queue_data.get("running", 0), 0, cast=int, lo=0),
+                    _coerce_number(queue_data.get("max_jobs", 100), 100, cast=int, lo=1)
+                ))
+                queue_exhaustion[queue_name] = None  # Filled below, keeps queue order
+            
+            if names:
+                # Utilization, exhaustion probability and risk for all queues in one pass
+                pending, running, max_jobs = np.array(counts, dtype=np.int64).T
+                utilization = (running + pending) / max_jobs
+                probabilities = np.take(_QUEUE_EXHAUSTION_PROBS, np.searchsorted(self._queue_thresholds, utilization))
+                risk_levels = np.searchsorted(_RISK_BINS, probabilities).tolist()
+                
+                for queue_name, (queue_pending, queue_running, queue_max), prob, util, risk in zip(
+                        names, counts, probabilities.tolist(), utilization.tolist(), risk_levels):
                     queue_exhaustion[queue_name] = {
-                        "exhaustion_probability": exhaustion_prob,
-                        "utilization": utilization,
-                        "pending_jobs": pending,
-                        "running_jobs": running,
-                        "max_jobs": max_jobs,
-                        "risk_level": self._get_risk_level(exhaustion_prob)
+                        "exhaustion_probability": prob,
+                        "utilization": util,
+                        "pending_jobs": queue_pending,
+                        "running_jobs": queue_running,
+                        "max_jobs": queue_max,
+                        "risk_level": _RISK_BY_BIN[risk]
                     }
-                except Exception as e:
-                    queue_exhaustion[queue_name] = {"error": str(e)}
-                    
+            
             return queue_exhaustion
         except Exception as e:
-            logger.error(f"Error in _predict_queue_exhaustion: {e}")
+            logger.error("Error in _predict_queue_exhaustion: %s", e)
             return {"error": str(e)}
         
-    def _estimate_cpu_exhaustion_time(self, usage: float, available: int) -> float:
-        """Estimate time to CPU exhaustion"""
-        if usage >= 0.95:
-            return 0.1  # Already critical
-        elif available <= 0:
-            return 0.5  # No available cores
-            
-        # Simple linear projection
-        remaining_capacity = 0.95 - usage
-        if remaining_capacity <= 0:
-            return 0.1
-            
-        # Assume current job load continues
-        time_to_exhaustion = remaining_capacity * 24  # Hours
-        
-        return max(0.1, time_to_exhaustion)
-        
-    def _estimate_memory_exhaustion_time(self, usage: float, available_gb: float) -> float:
-        """Estimate time to memory exhaustion"""
-        if usage >= 0.95:
-            return 0.1  # Already critical
-            
-        # Simple linear projection
-        remaining_capacity = 0.95 - usage
-        if remaining_capacity <= 0:
-            return 0.1
-            
-        # Assume current memory usage pattern continues
-        time_to_exhaustion = remaining_capacity * 48  # Hours
-        
-        return max(0.1, time_to_exhaustion)
-        
-    def _estimate_storage_exhaustion_time(self, usage: float, free_gb: float) -> float:
-        """Estimate time to storage exhaustion"""
-        if usage >= 0.95:
-            return 0.1  # Already critical
-            
-        # Simple linear projection based on current usage
-        remaining_capacity = 0.95 - usage
-        if remaining_capacity <= 0:
-            return 0.1
-            
-        # Assume current storage growth rate continues
-        time_to_exhaustion = remaining_capacity * 168  # Hours (1 week)
-        
-        return max(0.1, time_to_exhaustion)
-        
     def _assess_overall_risk(self, predictions: Dict) -> Dict:
         """Assess overall resource exhaustion risk"""
         try:
@@ -644,13 +777,9 @@ class ResourceExhaustionPredictor:
                         if queue_risks:
                             risks.extend(queue_risks)
                         
-            # Calculate overall risk
-            if not risks:
-                overall_risk_level = "UNKNOWN"
-            else:
-                risk_scores = {"LOW": 1, "MODERATE": 2, "HIGH": 3, "CRITICAL": 4, "UNKNOWN": 0}
-                max_risk_score = max([risk_scores.get(risk, 1) for risk in risks])
-                overall_risk_level = [k for k, v in risk_scores.items() if v == max_risk_score][0]
+            # Calculate overall risk (unrecognized levels count as LOW)
+            max_risk_score = max((_RISK_SCORES.get(risk, 1) for risk in risks), default=0)
+            overall_risk_level = RISK_LEVELS[max_risk_score]
                 
             return {
                 "overall_risk_level": overall_risk_level,
@@ -658,7 +787,7 @@ class ResourceExhaustionPredictor:
                 "critical_resources": [r for r in risks if r in ["HIGH", "CRITICAL"]]
             }
         except Exception as e:
-            logger.error(f"Error in _assess_overall_risk: {e}")
+            logger.error("Error in _assess_overall_risk: %s", e)
             return {
                 "overall_risk_level": "UNKNOWN",
                 "resource_risks": [],
@@ -668,44 +797,10 @@ class ResourceExhaustionPredictor:
     def _get_exhaustion_recommendations(self, predictions: Dict, overall_risk: Dict) -> List[str]:
         """Get recommendations for resource exhaustion prevention"""
         try:
-            recommendations = []
-            
             risk_level = overall_risk.get("overall_risk_level", "UNKNOWN")
-            
-            if risk_level == "CRITICAL":
-                recommendations.extend([
-                    "🚨 CRITICAL: Immediate resource management required",
-                    "🚨 CRITICAL: Reduce job concurrency",
-                    "🚨 CRITICAL: Implement emergency resource allocation",
-                    "🚨 CRITICAL: Contact system administrators"
-                ])
-            elif risk_level == "HIGH":
-                recommendations.extend([
-                    "⚠️  HIGH RISK: Optimize resource allocation",
-                    "⚠️  HIGH RISK: Reduce job queue size",
-                    "⚠️  HIGH RISK: Monitor resource usage closely",
-                    "⚠️  HIGH RISK: Plan resource expansion"
-                ])
-            elif risk_level == "MODERATE":
-                recommendations.extend([
-                    "📊 MODERATE RISK: Continue monitoring",
-                    "📊 MODERATE RISK: Optimize job scheduling",
-                    "📊 MODERATE RISK: Plan resource management"
-                ])
-            elif risk_level == "UNKNOWN":
-                recommendations.extend([
-                    "❓ UNKNOWN RISK: Check system status",
-                    "❓ UNKNOWN RISK: Verify resource data"
-                ])
-            else:
-                recommendations.extend([
-                    "✅ LOW RISK: Normal operations",
-                    "✅ LOW RISK: Regular monitoring sufficient"
-                ])
-                
-            return recommendations
+            return list(_EXHAUSTION_RECOMMENDATIONS.get(risk_level, _EXHAUSTION_RECOMMENDATIONS["LOW"]))
         except Exception as e:
-            logger.error(f"Error in _get_exhaustion_recommendations: {e}")
+            logger.error("Error in _get_exhaustion_recommendations: %s", e)
             return ["Error occurred while generating recommendations"]
         
     def _get_optimization_suggestions(self, predictions: Dict) -> List[str]:
@@ -713,46 +808,27 @@ class ResourceExhaustionPredictor:
         try:
             suggestions = []
             
-            # CPU optimization
-            if "cpu" in predictions and isinstance(predictions["cpu"], dict):
-                cpu_pred = predictions["cpu"]
-                if "error" not in cpu_pred and cpu_pred.get("exhaustion_probability", 0) > 0.3:
-                    suggestions.append("🖥️  CPU: Reduce job concurrency or increase CPU allocation")
-                    
-            # Memory optimization
-            if "memory" in predictions and isinstance(predictions["memory"], dict):
-                memory_pred = predictions["memory"]
-                if "error" not in memory_pred and memory_pred.get("exhaustion_probability", 0) > 0.3:
-                    suggestions.append("🧠 Memory: Optimize memory usage or increase memory allocation")
-                    
-            # Storage optimization
-            if "storage" in predictions and isinstance(predictions["storage"], dict):
-                storage_pred = predictions["storage"]
-                if "error" not in storage_pred and storage_pred.get("exhaustion_probability", 0) > 0.3:
-                    suggestions.append("💾 Storage: Clean up temporary files or expand storage")
+            for resource, suggestion in _RESOURCE_SUGGESTIONS:
+                pred = predictions.get(resource)
+                if isinstance(pred, dict) and "error" not in pred and \
+                        pred.get("exhaustion_probability", 0) > _SUGGESTION_PROBABILITY:
+                    suggestions.append(suggestion)
                     
             # Queue optimization
             if "queues" in predictions and isinstance(predictions["queues"], dict):
                 for queue_name, queue_pred in predictions["queues"].items():
                     if isinstance(queue_pred, dict) and "error" not in queue_pred:
-                        if queue_pred.get("exhaustion_probability", 0) > 0.3:
+                        if queue_pred.get("exhaustion_probability", 0) > _SUGGESTION_PROBABILITY:
                             suggestions.append(f"📋 Queue {queue_name}: Reduce pending jobs or use alternative queues")
                             
             return suggestions
         except Exception as e:
-            logger.error(f"Error in _get_optimization_suggestions: {e}")
+            logger.error("Error in _get_optimization_suggestions: %s", e)
             return ["Error occurred while generating optimization suggestions"]
         
     def _get_risk_level(self, probability: float) -> str:
         """Get risk level based on probability"""
-        if probability > 0.8:
-            return "CRITICAL"
-        elif probability > 0.5:
-            return "HIGH"
-        elif probability > 0.2:
-            return "MODERATE"
-        else:
-            return "LOW"
+        return _RISK_BY_BIN[bisect_left(_RISK_BINS, probability)]
 
 class NetworkTopologyAwareness:
     """Network topology awareness for HPC optimization"""
@@ -762,25 +838,79 @@ class NetworkTopologyAwareness:
         self.topology_cache = {}
         self.network_performance_history = deque(maxlen=1000)
         
+        # Interfaces, routes and mounts rarely change; network counters do
+        self.topology_cache_ttl = self.config.get("topology_cache_ttl", 600)  # seconds
+        self.counter_cache_ttl = self.config.get("network_counter_cache_ttl", 30)  # seconds
+        self._probe_cache = {}  # probe name -> (monotonic timestamp, value)
+        self._probe_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # The probes are independent and mostly wait on IO, so they run side by side
+        self.probe_timeout = self.config.get("topology_probe_timeout", 15)  # seconds
+        self._probe_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="topology")
+        
+        ttl = self.topology_cache_ttl
+        self._probes = {
+            "host_info": (ttl, self._get_host_info),
+            "network_interfaces": (ttl, self._get_network_interfaces),
+            "routing_info": (ttl, self._get_routing_info),
+            "performance_metrics": (self.counter_cache_ttl, self._get_network_performance),
+            "storage_connectivity": (ttl, self._get_storage_connectivity),
+            "compute_node_connectivity": (ttl, self._get_compute_node_connectivity)
+        }
+        
     def discover_network_topology(self) -> Dict:
         """Discover network topology and performance characteristics"""
-        
-        topology = {
-            "host_info": self._get_host_info(),
-            "network_interfaces": self._get_network_interfaces(),
-            "routing_info": self._get_routing_info(),
-            "performance_metrics": self._get_network_performance(),
-            "storage_connectivity": self._get_storage_connectivity(),
-            "compute_node_connectivity": self._get_compute_node_connectivity()
-        }
+        topology = self._probe_topology(self._probes)
         
         # Cache topology information
         self.topology_cache = topology
         
         return topology
         
+    def _probe_topology(self, names) -> Dict:
+        """Run the named probes concurrently, each through the probe cache"""
+        futures = {
+            name: self._probe_executor.submit(self._cached, name, *self._probes[name])
+            for name in names
+        }
+        deadline = time.monotonic() + self.probe_timeout
+        topology = {}
+        for name, future in futures.items():
+            try:
+                topology[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                logger.warning("Topology probe %s timed out", name)
+                topology[name] = {"error": "Probe timed out"}
+        return topology
+        
+    def _cached(self, name: str, ttl: float, probe):
+        """Return probe(), reusing the previous result for ttl seconds"""
+        with self._probe_lock:
+            cached = self._probe_cache.get(name)
+            if cached and time.monotonic() - cached[0] < ttl:
+                self.cache_hits += 1
+                return cached[1]
+            self.cache_misses += 1
+            
+        value = probe()
+        with self._probe_lock:
+            self._probe_cache[name] = (time.monotonic(), value)
+        return value
+        
+    def invalidate_topology_cache(self, name: Optional[str] = None):
+        """Drop one cached probe result, or all of them, so the next discovery re-probes"""
+        with self._probe_lock:
+            if name is None:
+                self._probe_cache.clear()
+                self.topology_cache = {}
+            else:
+                self._probe_cache.pop(name, None)
+        
     def _get_host_info(self) -> Dict:
         """Get host information"""
+        import platform  # Only needed here; kept off the import path of the predictors
         return {
             "hostname": socket.gethostname(),
             "platform": platform.platform(),
@@ -794,54 +924,40 @@ class NetworkTopologyAwareness:
         interfaces = {}
         
         try:
-            # Get network interface information
-            result = subprocess.run(['ip', 'addr', 'show'], capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                interfaces = self._parse_network_interfaces(result.stdout)
-        except:
+            import psutil  # Imported lazily, like platform in _get_host_info
+            addresses = psutil.net_if_addrs()
+            for name, stats in psutil.net_if_stats().items():
+                interfaces[name] = {
+                    "status": "up" if stats.isup else "down",
+                    "speed": stats.speed or "unknown"  # Mb/s, 0 when the driver does not report it
+                }
+                mac = next((addr.address for addr in addresses.get(name, ()) if addr.family == psutil.AF_LINK), None)
+                if mac:
+                    interfaces[name]["mac"] = mac
+        except Exception:
             # Fallback to basic interface info
             interfaces = {"eth0": {"status": "unknown", "speed": "unknown"}}
             
         return interfaces
         
-    def _parse_network_interfaces(self, ip_output: str) -> Dict:
-        """Parse ip addr show output"""
-        interfaces = {}
-        current_interface = None
-        
-        for line in ip_output.split('\n'):
-            if ':' in line and not line.startswith(' '):
-                # Interface line
-                parts = line.split(':')
-                if len(parts) >= 2:
-                    interface_name = parts[1].strip()
-                    current_interface = interface_name
-                    interfaces[interface_name] = {
-                        "status": "up" if "UP" in line else "down",
-                        "speed": "unknown"
-                    }
-            elif current_interface and "link/ether" in line:
-                # MAC address line
-                interfaces[current_interface]["mac"] = line.split()[1]
-                
-        return interfaces
-        
     def _get_routing_info(self) -> Dict:
-        """Get routing information"""
-        routing_info = {}
+        """Get routing information from /proc/net/route"""
+        routing_info = {"routes": [], "default_gateway": ""}
         
         try:
-            # Get routing table
-            result = subprocess.run(['ip', 'route', 'show'], capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                routing_info["routes"] = result.stdout.split('\n')
-                
-            # Get default gateway
-            result = subprocess.run(['ip', 'route', 'show', 'default'], capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                routing_info["default_gateway"] = result.stdout.strip()
-                
-        except:
+            with open("/proc/net/route") as f:
+                next(f)  # header
+                for line in f:
+                    fields = line.split()
+                    iface, destination, gateway, mask = fields[0], fields[1], fields[2], fields[7]
+                    if destination == "00000000":
+                        route = f"default via {_hex_to_ipv4(gateway)} dev {iface}"
+                        routing_info["default_gateway"] = routing_info["default_gateway"] or route
+                    else:
+                        prefix = bin(int(mask, 16)).count("1")
+                        route = f"{_hex_to_ipv4(destination)}/{prefix} dev {iface}"
+                    routing_info["routes"].append(route)
+        except (OSError, IndexError, ValueError):
             routing_info["error"] = "Could not get routing information"
             
         return routing_info
@@ -851,6 +967,8 @@ class NetworkTopologyAwareness:
         performance = {}
         
         try:
+            import psutil
+            
             # Get network statistics
             net_stats = psutil.net_io_counters()
             performance = {
@@ -880,23 +998,34 @@ class NetworkTopologyAwareness:
         
     def _get_storage_connectivity(self) -> Dict:
         """Get storage connectivity information"""
-        storage_info = {}
+        storage_info = {"nfs_mounts": [], "local_storage": []}
         
         # Check NFS mounts
         try:
-            result = subprocess.run(['mount', '-t', 'nfs'], capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                storage_info["nfs_mounts"] = result.stdout.split('\n')
-        except:
-            storage_info["nfs_mounts"] = []
+            with open("/proc/mounts") as f:
+                storage_info["nfs_mounts"] = [line.rstrip("\n") for line in f
+                                              if line.split()[2] in _NFS_FSTYPES]
+        except (OSError, IndexError):
+            pass
             
         # Check local storage
         try:
-            result = subprocess.run(['df', '-h'], capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                storage_info["local_storage"] = result.stdout.split('\n')
-        except:
-            storage_info["local_storage"] = []
+            import psutil
+            for partition in psutil.disk_partitions():
+                try:
+                    usage = shutil.disk_usage(partition.mountpoint)
+                except OSError:
+                    continue
+                storage_info["local_storage"].append({
+                    "device": partition.device,
+                    "mountpoint": partition.mountpoint,
+                    "fstype": partition.fstype,
+                    "total": usage.total,
+                    "used": usage.used,
+                    "free": usage.free
+                })
+        except Exception:
+            pass
             
         return storage_info
         
@@ -909,16 +1038,12 @@ class NetworkTopologyAwareness:
         connectivity["hostname"] = hostname
         
         # Check for common HPC node patterns
-        if any(pattern in hostname.lower() for pattern in ['node', 'compute', 'worker']):
-            connectivity["node_type"] = "compute"
-        else:
-            connectivity["node_type"] = "head/login"
+        connectivity["node_type"] = "compute" if _COMPUTE_NODE_PATTERN.search(hostname) else "head/login"
             
         # Check for job scheduler environment
-        scheduler_vars = ['SLURM_JOB_ID', 'PBS_JOBID', 'LSB_JOBID']
-        for var in scheduler_vars:
+        for var, scheduler in _SCHEDULER_JOB_VARS.items():
             if var in os.environ:
-                connectivity["scheduler"] = var.split('_')[0]
+                connectivity["scheduler"] = scheduler
                 connectivity["job_id"] = os.environ[var]
                 break
                 
@@ -926,61 +1051,29 @@ class NetworkTopologyAwareness:
         
     def optimize_for_topology(self, job_requirements: Dict) -> Dict:
         """Optimize job requirements based on network topology"""
-        topology = self.topology_cache or self.discover_network_topology()
+        topology = self._probe_topology(("performance_metrics", "storage_connectivity"))
         
-        optimizations = {
-            "data_locality": self._optimize_data_locality(job_requirements, topology),
-            "network_awareness": self._optimize_network_awareness(job_requirements, topology),
-            "storage_optimization": self._optimize_storage_access(job_requirements, topology)
-        }
-        
-        return optimizations
-        
-    def _optimize_data_locality(self, job_requirements: Dict, topology: Dict) -> Dict:
-        """Optimize for data locality"""
-        recommendations = []
+        # Read each topology value once and derive all three assessments from them
+        nfs_mounts = topology["storage_connectivity"].get("nfs_mounts", [])
+        error_rate = topology["performance_metrics"].get("error_rate", 0)
+        many_mounts = len(nfs_mounts) > 3
         
-        # Check if data is local or remote
-        if "nfs_mounts" in topology.get("storage_connectivity", {}):
-            recommendations.append("📁 Data appears to be on NFS - consider data staging")
-        else:
-            recommendations.append("📁 Data appears to be local - good for performance")
-            
         return {
-            "recommendations": recommendations,
-            "data_locality_score": 0.8 if "nfs_mounts" not in topology.get("storage_connectivity", {}) else 0.4
-        }
-        
-    def _optimize_network_awareness(self, job_requirements: Dict, topology: Dict) -> Dict:
-        """Optimize for network awareness"""
-        recommendations = []
-        
-        # Check network performance
-        perf = topology.get("performance_metrics", {})
-        if perf.get("error_rate", 0) > 0.01:  # 1% error rate
-            recommendations.append("🌐 High network error rate - consider reducing network usage")
-        else:
-            recommendations.append("🌐 Network performance looks good")
-            
-        return {
-            "recommendations": recommendations,
-            "network_quality_score": 1.0 - perf.get("error_rate", 0)
-        }
-        
-    def _optimize_storage_access(self, job_requirements: Dict, topology: Dict) -> Dict:
-        """Optimize storage access patterns"""
-        recommendations = []
-        
-        # Check storage connectivity
-        storage = topology.get("storage_connectivity", {})
-        if len(storage.get("nfs_mounts", [])) > 3:
-            recommendations.append("💾 Multiple NFS mounts - consider consolidating data access")
-        else:
-            recommendations.append("💾 Storage access pattern looks optimal")
-            
-        return {
-            "recommendations": recommendations,
-            "storage_efficiency_score": 0.9 if len(storage.get("nfs_mounts", [])) <= 3 else 0.6
+            "data_locality": {
+                "recommendations": ["📁 Data appears to be on NFS - consider data staging" if nfs_mounts
+                                    else "📁 Data appears to be local - good for performance"],
+                "data_locality_score": 0.4 if nfs_mounts else 0.8
+            },
+            "network_awareness": {
+                "recommendations": ["🌐 High network error rate - consider reducing network usage" if error_rate > 0.01  # 1% error rate
+                                    else "🌐 Network performance looks good"],
+                "network_quality_score": 1.0 - error_rate
+            },
+            "storage_optimization": {
+                "recommendations": ["💾 Multiple NFS mounts - consider consolidating data access" if many_mounts
+                                    else "💾 Storage access pattern looks optimal"],
+                "storage_efficiency_score": 0.6 if many_mounts else 0.9
+            }
         }
 
 class HPCManagementIntegration:
@@ -991,6 +1084,12 @@ class HPCManagementIntegration:
         self.scheduler_type = self._detect_scheduler()
         self.management_systems = self._detect_management_systems()
         
+        # Scheduler commands can take seconds on a busy cluster; answers stay valid for a while
+        self.scheduler_cache_ttl = self.config.get("scheduler_cache_ttl", 10)  # seconds
+        self._probe_cache = {}  # probe name -> (monotonic timestamp, value)
+        self._probe_lock = threading.Lock()
+        self._probe_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scheduler")
+        
     def _detect_scheduler(self) -> str:
         """Detect job scheduler type"""
         # Check for common schedulers
@@ -1005,8 +1104,6 @@ class HPCManagementIntegration:
             
     def _detect_management_systems(self) -> List[str]:
         """Detect available HPC management systems"""
-        systems = []
-        
         # Check for common HPC management tools
         management_tools = {
             "ganglia": ["gstat", "gmetric"],
@@ -1016,16 +1113,11 @@ class HPCManagementIntegration:
             "grafana": ["grafana-server"]
         }
         
-        for system, tools in management_tools.items():
-            for tool in tools:
-                try:
-                    result = subprocess.run(['which', tool], capture_output=True, timeout=5)
-                    if result.returncode == 0:
-                        systems.append(system)
-                        break
-                except:
-                    continue
-                    
+        # One scan of PATH instead of a `which` per tool
+        available = _executables_on_path()
+        systems = [system for system, tools in management_tools.items()
+                   if any(tool in available for tool in tools)]
+        
         return systems
         
     def get_scheduler_info(self) -> Dict:
@@ -1039,26 +1131,42 @@ class HPCManagementIntegration:
         
         if self.scheduler_type == "lsf":
             info["available_commands"] = ["bsub", "bjobs", "bqueues", "bhosts"]
-            info["queue_info"] = self._get_lsf_queue_info()
-            info["job_info"] = self._get_lsf_job_info()
+            queue_probe, job_probe = self._get_lsf_queue_info, self._get_lsf_job_info
         elif self.scheduler_type == "slurm":
             info["available_commands"] = ["sbatch", "squeue", "sinfo", "sacct"]
-            info["queue_info"] = self._get_slurm_queue_info()
-            info["job_info"] = self._get_slurm_job_info()
+            queue_probe, job_probe = self._get_slurm_queue_info, self._get_slurm_job_info
         elif self.scheduler_type == "pbs":
             info["available_commands"] = ["qsub", "qstat", "pbsnodes"]
-            info["queue_info"] = self._get_pbs_queue_info()
-            info["job_info"] = self._get_pbs_job_info()
+            queue_probe, job_probe = self._get_pbs_queue_info, self._get_pbs_job_info
+        else:
+            return info
+            
+        # Query queues in the background while jobs are queried here
+        queue_future = self._probe_executor.submit(self._cached, "queue_info", queue_probe)
+        info["job_info"] = self._cached("job_info", job_probe)
+        info["queue_info"] = queue_future.result()
             
         return info
         
+    def _cached(self, name: str, probe):
+        """Return probe(), reusing the previous result for scheduler_cache_ttl seconds"""
+        with self._probe_lock:
+            cached = self._probe_cache.get(name)
+        if cached and time.monotonic() - cached[0] < self.scheduler_cache_ttl:
+            return cached[1]
+        
+        value = probe()
+        with self._probe_lock:
+            self._probe_cache[name] = (time.monotonic(), value)
+        return value
+        
     def _get_lsf_queue_info(self) -> Dict:
         """Get LSF queue information"""
         try:
             result = subprocess.run(['bqueues', '-w'], capture_output=True, text=True, timeout=10)
             if result.returncode == 0:
                 return {"status": "available", "output": result.stdout}
-        except:
+        except (OSError, subprocess.SubprocessError):
             pass
         return {"status": "unavailable"}
         
@@ -1068,7 +1176,7 @@ class HPCManagementIntegration:
             result = subprocess.run(['bjobs'], capture_output=True, text=True, timeout=10)
             if result.returncode == 0:
                 return {"status": "available", "output": result.stdout}
-        except:
+        except (OSError, subprocess.SubprocessError):
             pass
         return {"status": "unavailable"}
         
@@ -1078,7 +1186,7 @@ class HPCManagementIntegration:
             result = subprocess.run(['sinfo'], capture_output=True, text=True, timeout=10)
             if result.returncode == 0:
                 return {"status": "available", "output": result.stdout}
-        except:
+        except (OSError, subprocess.SubprocessError):
             pass
         return {"status": "unavailable"}
         
@@ -1088,7 +1196,7 @@ class HPCManagementIntegration:
             result = subprocess.run(['squeue'], capture_output=True, text=True, timeout=10)
             if result.returncode == 0:
                 return {"status": "available", "output": result.stdout}
-        except:
+        except (OSError, subprocess.SubprocessError):
             pass
         return {"status": "unavailable"}
         
@@ -1098,7 +1206,7 @@ class HPCManagementIntegration:
             result = subprocess.run(['qstat', '-q'], capture_output=True, text=True, timeout=10)
             if result.returncode == 0:
                 return {"status": "available", "output": result.stdout}
-        except:
+        except (OSError, subprocess.SubprocessError):
             pass
         return {"status": "unavailable"}
         
@@ -1108,7 +1216,7 @@ class HPCManagementIntegration:
             result = subprocess.run(['qstat'], capture_output=True, text=True, timeout=10)
             if result.returncode == 0:
                 return {"status": "available", "output": result.stdout}
-        except:
+        except (OSError, subprocess.SubprocessError):
             pass
         return {"status": "unavailable"}
         
@@ -1132,9 +1240,23 @@ class HPCManagementIntegration:
                 return {"status": "available", "test_result": result.returncode == 0}
             else:
                 return {"status": "unknown", "test_result": False}
-        except:
+        except (OSError, subprocess.SubprocessError):
             return {"status": "unavailable", "test_result": False}
 
+def _print_json(obj, prefix: str = ""):
+    """Pretty-print obj as JSON, with orjson when it is installed"""
+    if orjson is not None:
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            data = None  # Something orjson cannot encode; let json report it
+        if data is not None:
+            sys.stdout.flush()
+            sys.stdout.buffer.write(prefix.encode() + data + b"\n")
+            sys.stdout.buffer.flush()
+            return
+    print(prefix + json.dumps(obj, indent=2))
+
 def main():
     """Test the advanced features"""
     import argparse
@@ -1154,7 +1276,7 @@ def main():
         print("🧪 Testing Storage Failure Prediction")
         predictor = StorageFailurePredictor(config)
         prediction = predictor.predict_storage_failure(0.996, 0.05)  # 99.6% usage, 5% growth
-        print(json.dumps(prediction, indent=2))
+        _print_json(prediction)
         
     if args.test_resource_prediction:
         print("🧪 Testing Resource Exhaustion Prediction")
@@ -1166,21 +1288,21 @@ def main():
             "lsf": {"normal": {"pending": 50, "running": 0, "max_jobs": 100}}
         }
         prediction = predictor.predict_resource_exhaustion(current_resources)
-        print(json.dumps(prediction, indent=2))
+        _print_json(prediction)
         
     if args.test_network_topology:
         print("🧪 Testing Network Topology Awareness")
         topology = NetworkTopologyAwareness(config)
         network_info = topology.discover_network_topology()
-        print(json.dumps(network_info, indent=2))
+        _print_json(network_info)
         
     if args.test_hpc_integration:
         print("🧪 Testing HPC Management Integration")
         integration = HPCManagementIntegration(config)
         scheduler_info = integration.get_scheduler_info()
         management_status = integration.integrate_with_management_systems()
-        print("Scheduler Info:", json.dumps(scheduler_info, indent=2))
-        print("Management Systems:", json.dumps(management_status, indent=2))
+        _print_json(scheduler_info, "Scheduler Info: ")
+        _print_json(management_status, "Management Systems: ")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -5,12 +5,46 @@ Manages storage and cleanup operations for STAR alignment workflow.
 """
 
 import os
+import gzip
+import math
 import shutil
+import stat
+import time
 import subprocess
 import argparse
+import contextlib
 from pathlib import Path
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 import json
+from fsutil import format_size, find_mount
+
+COPY_BUFFER_SIZE = 1 << 20  # 1 MiB read size when compressing logs
+
+def gzip_file(path, compresslevel=6):
+    """Compress path to path.gz and remove the original, as `gzip` does."""
+    gz_path = f"{path}.gz"
+    try:
+        with open(path, 'rb') as src, open(gz_path, 'wb') as raw:
+            mtime = os.fstat(src.fileno()).st_mtime
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            with gzip.GzipFile(os.path.basename(path), 'wb', compresslevel, raw, mtime) as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+            if hasattr(os, 'posix_fadvise'):
+                # The log is read once; don't let it push active jobs' data out of the page cache
+                os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        shutil.copystat(path, gz_path)
+    except BaseException:
+        # Never leave a truncated .gz next to the original
+        with contextlib.suppress(OSError):
+            os.unlink(gz_path)
+        raise
+    os.unlink(path)
+
+def is_final_output(name):
+    """Whether a file is a final output to keep (final BAMs and flagstat reports)."""
+    return name.endswith('.flagstat') or (name.endswith('.bam') and 'final' in name)
 
 class CleanupManager:
     """Manage cleanup operations for STAR alignment workflow."""
@@ -21,55 +55,92 @@ class CleanupManager:
         self.logs_dir = self.workflow_dir / "logs"
         self.temp_dir = self.workflow_dir / "temp"
         
+        # (directory, suffix) -> file count, filled by the cleanup passes and the report
+        self._file_counts = {}
+        
     def get_disk_usage(self):
         """Get disk usage information."""
         try:
-            result = subprocess.run(['df', '-h', str(self.workflow_dir)], 
-                                  capture_output=True, text=True, check=True)
-            lines = result.stdout.strip().split('\n')
-            if len(lines) >= 2:
-                parts = lines[1].split()
-                return {
-                    'filesystem': parts[0],
-                    'size': parts[1],
-                    'used': parts[2],
-                    'available': parts[3],
-                    'use_percent': parts[4],
-                    'mounted_on': parts[5]
-                }
-        except subprocess.CalledProcessError:
+            usage = shutil.disk_usage(self.workflow_dir)
+        except OSError:
             return None
+        
+        mount_point, filesystem = find_mount(self.workflow_dir)
+        return {
+            'filesystem': filesystem,
+            'size': format_size(usage.total),
+            'used': format_size(usage.used),
+            'available': format_size(usage.free),
+            'use_percent': f"{math.ceil(usage.used * 100 / (usage.used + usage.free)) if usage.total else 0}%",
+            'mounted_on': mount_point
+        }
     
     def get_directory_size(self, path):
         """Get size of directory."""
+        return self.get_directory_sizes([path]).get(str(path), "Unknown")
+    
+    def get_directory_sizes(self, paths):
+        """Get sizes of several directories with a single du call."""
+        paths = [str(path) for path in paths]
+        if not paths:
+            return {}
         try:
-            result = subprocess.run(['du', '-sh', str(path)], 
-                                  capture_output=True, text=True, check=True)
-            return result.stdout.split()[0]
-        except subprocess.CalledProcessError:
-            return "Unknown"
+            # du still reports the readable directories when it exits non-zero
+            result = subprocess.run(['du', '-sk', *paths], capture_output=True, text=True)
+        except OSError:
+            return {}
+        sizes = {}
+        for line in result.stdout.splitlines():
+            kilobytes, _, path = line.partition('\t')
+            sizes[path] = format_size(int(kilobytes) * 1024)
+        return sizes
+    
+    def count_files(self, path, suffix='', recursive=True):
+        """Count entries under path whose name ends with suffix (reusing counts from cleanup).
+        
+        Like Path.rglob/glob, subdirectories count as entries too.
+        """
+        key = (str(path), suffix, recursive)
+        if key not in self._file_counts:
+            if recursive:
+                count = sum(name.endswith(suffix) for _, dirs, files in os.walk(path) for name in dirs + files)
+            else:
+                try:
+                    with os.scandir(path) as it:
+                        count = sum(entry.name.endswith(suffix) for entry in it)
+                except (FileNotFoundError, NotADirectoryError):
+                    count = 0
+            self._file_counts[key] = count
+        return self._file_counts[key]
     
     def cleanup_temp_files(self, older_than_hours=24):
         """Clean up temporary files older than specified hours."""
         if not self.temp_dir.exists():
             return 0, 0
         
-        cutoff_time = datetime.now() - timedelta(hours=older_than_hours)
+        cutoff_time = time.time() - older_than_hours * 3600
         cleaned_count = 0
         cleaned_size = 0
+        total_count = 0
         
-        for item in self.temp_dir.rglob('*'):
-            if item.is_file():
-                file_mtime = datetime.fromtimestamp(item.stat().st_mtime)
-                if file_mtime < cutoff_time:
+        # fwalk hands us a descriptor per directory, so stat/unlink skip path resolution
+        for root, dirs, files, root_fd in os.fwalk(self.temp_dir):
+            total_count += len(dirs) + len(files)
+            for name in files:
+                try:
+                    st = os.stat(name, dir_fd=root_fd)
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode) and st.st_mtime < cutoff_time:
                     try:
-                        file_size = item.stat().st_size
-                        item.unlink()
+                        os.unlink(name, dir_fd=root_fd)
                         cleaned_count += 1
-                        cleaned_size += file_size
+                        cleaned_size += st.st_size
                     except Exception as e:
-                        print(f"Error deleting {item}: {e}")
+                        print(f"Error deleting {os.path.join(root, name)}: {e}")
         
+        # The report's temp file count comes for free from this walk
+        self._file_counts[(str(self.temp_dir), '', True)] = total_count - cleaned_count
         return cleaned_count, cleaned_size
     
     def cleanup_intermediate_files(self):
@@ -78,22 +149,27 @@ class CleanupManager:
         cleaned_size = 0
         
         # Clean up intermediate files in outputs
-        for sample_dir in self.outputs_dir.iterdir():
-            if sample_dir.is_dir() and sample_dir.name != "bams":
-                for file_path in sample_dir.rglob('*'):
-                    if file_path.is_file():
-                        # Keep only final BAM files and essential outputs
-                        if (file_path.suffix == '.bam' and 'final' in file_path.name) or \
-                           file_path.name.endswith('.flagstat'):
+        with os.scandir(self.outputs_dir) as entries:
+            sample_dirs = [entry.path for entry in entries
+                           if entry.is_dir() and entry.name != "bams"]
+        
+        for sample_dir in sample_dirs:
+            for root, dirs, files, root_fd in os.fwalk(sample_dir):
+                for name in files:
+                    if is_final_output(name):
+                        continue
+                    
+                    try:
+                        st = os.stat(name, dir_fd=root_fd)
+                        if not stat.S_ISREG(st.st_mode):
                             continue
-                        
-                        try:
-                            file_size = file_path.stat().st_size
-                            file_path.unlink()
-                            cleaned_count += 1
-                            cleaned_size += file_size
-                        except Exception as e:
-                            print(f"Error deleting {file_path}: {e}")
+                        os.unlink(name, dir_fd=root_fd)
+                        cleaned_count += 1
+                        cleaned_size += st.st_size
+                    except FileNotFoundError:
+                        continue  # dangling symlink
+                    except Exception as e:
+                        print(f"Error deleting {os.path.join(root, name)}: {e}")
         
         return cleaned_count, cleaned_size
     
@@ -102,17 +178,26 @@ class CleanupManager:
         if not self.logs_dir.exists():
             return 0
         
-        cutoff_time = datetime.now() - timedelta(days=older_than_days)
+        cutoff_time = time.time() - older_than_days * 86400
         compressed_count = 0
         
-        for log_file in self.logs_dir.glob('*.out'):
-            if log_file.stat().st_mtime < cutoff_time.timestamp():
+        logs = list(self.logs_dir.glob('*.out'))
+        old_logs = [log_file for log_file in logs if log_file.stat().st_mtime < cutoff_time]
+        self._file_counts[(str(self.logs_dir), '.out', False)] = len(logs)
+        if not old_logs:
+            return 0
+        
+        # Compression is CPU-bound, so spread the files over processes
+        with ProcessPoolExecutor(max_workers=min(len(old_logs), os.cpu_count() or 1)) as executor:
+            futures = [(log_file, executor.submit(gzip_file, log_file)) for log_file in old_logs]
+            for log_file, future in futures:
                 try:
-                    subprocess.run(['gzip', str(log_file)], check=True)
+                    future.result()
                     compressed_count += 1
-                except subprocess.CalledProcessError as e:
+                except Exception as e:
                     print(f"Error compressing {log_file}: {e}")
         
+        self._file_counts[(str(self.logs_dir), '.out', False)] = len(logs) - compressed_count
         return compressed_count
     
     def generate_report(self):
@@ -145,20 +230,20 @@ class CleanupManager:
             ("Temp files", self.temp_dir)
         ]
         
+        sizes = self.get_directory_sizes([path for _, path in directories if path.exists()])
         for name, path in directories:
             if path.exists():
-                size = self.get_directory_size(path)
-                print(f"{name:15}: {size}")
+                print(f"{name:15}: {sizes.get(str(path), 'Unknown')}")
             else:
                 print(f"{name:15}: Not found")
         print()
         
-        # File counts
+        # File counts (os.walk yields nothing for a missing directory)
         print("📊 FILE COUNTS:")
         print("-" * 12)
-        bam_count = len(list((self.workflow_dir / "bams").rglob('*.bam'))) if (self.workflow_dir / "bams").exists() else 0
-        log_count = len(list(self.logs_dir.glob('*.out'))) if self.logs_dir.exists() else 0
-        temp_count = len(list(self.temp_dir.rglob('*'))) if self.temp_dir.exists() else 0
+        bam_count = self.count_files(self.workflow_dir / "bams", '.bam')
+        log_count = self.count_files(self.logs_dir, '.out', recursive=False)
+        temp_count = self.count_files(self.temp_dir)
         
         print(f"BAM files: {bam_count}")
         print(f"Log files: {log_count}")
@@ -230,11 +315,12 @@ def main():
     
     manager = CleanupManager(args.workflow_dir)
     
+    # With both flags, cleanup runs first and the report reuses its file counts
+    if args.cleanup:
+        manager.auto_cleanup(args.dry_run)
     if args.report:
         manager.generate_report()
-    elif args.cleanup:
-        manager.auto_cleanup(args.dry_run)
-    else:
+    if not (args.cleanup or args.report):
         print("Use --report or --cleanup")
         parser.print_help()
 
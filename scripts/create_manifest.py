@@ -5,66 +5,153 @@ Creates a clean, validated manifest for STAR alignment processing.
 """
 
 import os
+import re
+import io
 import csv
 import sys
-from pathlib import Path
+import fnmatch
+import queue
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from fsutil import size_reader, stat_size
 
-def create_sample_manifest(base_dir, output_file, min_size=100000):
-    """Create sample manifest with validation."""
+R1_PATTERN = re.compile(fnmatch.translate("*_R1_*.fastq.gz"))
+SCAN_WORKERS = 16  # Concurrent directory scans; metadata latency on shared storage dominates
+STAT_BATCH_SIZE = 256  # Candidate pairs stat'ed per pool task
+WRITE_BUFFER_SIZE = 1 << 20  # 1 MiB manifest file buffer
+
+MANIFEST_FIELDS = ('sample_id', 'r1_path', 'r2_path', 'r1_size', 'r2_size', 'status')
+
+def format_rows(rows):
+    """Format manifest rows as CSV text in one string (csv module line endings)."""
+    text = "".join(f"{a},{b},{c},{d},{e},{f}\r\n" for a, b, c, d, e, f in rows)
+    # Only the delimiters and line endings we added: nothing needs quoting
+    if text.count(",") == 5 * len(rows) and text.count("\n") == text.count("\r") == len(rows) and '"' not in text:
+        return text
+    
+    # Rare: a path with a comma, quote or newline; let the csv module quote it
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+def scan_directory(directory):
+    """List one directory and pair its R1/R2 files by name.
     
-    print(f"🔍 Scanning {base_dir} for FASTQ pairs...")
+    Returns (subdirectories, candidate pairs as (sample_id, r1_entry, r2_entry),
+    R1 files seen, R1 files without an R2). Unreadable directories are treated
+    as empty.
+    """
+    subdirs = []
+    files = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    files[entry.name] = entry
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        return subdirs, [], 0, 0
     
-    # Find all R1 files
-    r1_files = list(Path(base_dir).rglob("*_R1_*.fastq.gz"))
-    print(f"📊 Found {len(r1_files)} R1 files")
+    # Pair R1/R2 from the directory listing itself: no existence checks
+    candidates = []
+    r1_count = 0
+    for name, r1_entry in files.items():
+        if R1_PATTERN.match(name):
+            r1_count += 1
+            r2_entry = files.get(name.replace("_R1_", "_R2_"))
+            if r2_entry is not None:
+                candidates.append((name.split("_R1_")[0], r1_entry, r2_entry))
     
-    valid_pairs = []
+    return subdirs, candidates, r1_count, r1_count - len(candidates)
+
+def stat_pairs(candidates, min_size, size_of=stat_size):
+    """Stat a batch of candidate pairs; returns (manifest rows, pairs skipped)."""
+    rows = []
     skipped_count = 0
-    
-    for r1_file in r1_files:
-        # Generate R2 path
-        r2_file = r1_file.parent / r1_file.name.replace("_R1_", "_R2_")
-        
-        if not r2_file.exists():
+    for sample_id, r1_entry, r2_entry in candidates:
+        try:
+            r1_size = size_of(r1_entry.path)
+            r2_size = size_of(r2_entry.path)
+        except FileNotFoundError:  # dangling symlink
             skipped_count += 1
             continue
             
-        # Check file sizes
-        r1_size = r1_file.stat().st_size
-        r2_size = r2_file.stat().st_size
-        
         if r1_size < min_size or r2_size < min_size:
             skipped_count += 1
             continue
             
-        # Extract sample ID
-        sample_id = r1_file.name.split("_R1_")[0]
-        
-        valid_pairs.append({
-            'sample_id': sample_id,
-            'r1_path': str(r1_file),
-            'r2_path': str(r2_file),
-            'r1_size': r1_size,
-            'r2_size': r2_size
-        })
+        # One flat tuple per sample, already in MANIFEST_FIELDS order
+        rows.append((sample_id, r1_entry.path, r2_entry.path, r1_size, r2_size, 'pending'))
+    
+    return rows, skipped_count
+
+def create_sample_manifest(base_dir, output_file, min_size=100000, stream=False, workers=SCAN_WORKERS):
+    """Create sample manifest with validation.
     
-    print(f"✅ Found {len(valid_pairs)} valid pairs (skipped {skipped_count} small/empty files)")
+    With stream=True, the manifest is written to stdout and progress messages
+    go to stderr, so a parent process can consume it through a pipe. Rows are
+    sorted by sample so re-runs give identical manifests (and chunks).
+    """
+    log = sys.stderr if stream else sys.stdout
     
-    # Write manifest
-    with open(output_file, 'w', newline='') as f:
-        fieldnames = ['sample_id', 'r1_path', 'r2_path', 'r1_size', 'r2_size', 'status']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+    print(f"🔍 Scanning {base_dir} for FASTQ pairs...", file=log)
+    
+    out = sys.stdout if stream else open(output_file, 'w', newline='', buffering=WRITE_BUFFER_SIZE)
+    try:
+        out.write(format_rows([MANIFEST_FIELDS]))
+        
+        r1_count = 0
+        skipped_count = 0
+        manifest_rows = []
+        size_of = size_reader(base_dir)  # statx without OST sync on Lustre
+        
+        # Walk the tree with a pool of scanners so directory listings and stats overlap.
+        # Stats go out in batches, so a directory with thousands of pairs is spread
+        # over the pool rather than stat'ed serially by the worker that listed it.
+        # Finished tasks report to one queue, so each completion costs O(1) to pick up.
+        completed = queue.SimpleQueue()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def submit(kind, fn, *args):
+                executor.submit(fn, *args).add_done_callback(lambda future: completed.put((kind, future)))
+                
+            submit("scan", scan_directory, str(base_dir))
+            outstanding = 1
+            while outstanding:
+                kind, future = completed.get()
+                outstanding -= 1
+                if kind == "scan":
+                    subdirs, candidates, found, unpaired = future.result()
+                    for subdir in subdirs:
+                        submit("scan", scan_directory, subdir)
+                        outstanding += 1
+                    for i in range(0, len(candidates), STAT_BATCH_SIZE):
+                        submit("stat", stat_pairs, candidates[i:i + STAT_BATCH_SIZE], min_size, size_of)
+                        outstanding += 1
+                    r1_count += found
+                    skipped_count += unpaired
+                    continue
+                    
+                rows, skipped = future.result()
+                skipped_count += skipped
+                manifest_rows.extend(rows)
         
-        for idx, sample in enumerate(valid_pairs, 1):
-            sample['status'] = 'pending'
-            writer.writerow(sample)
+        # Completion order varies from run to run; sample order does not
+        manifest_rows.sort()
+        valid_count = len(manifest_rows)
+        if manifest_rows:
+            out.write(format_rows(manifest_rows))
+    finally:
+        if not stream:
+            out.close()
     
-    print(f"📄 Manifest created: {output_file}")
-    print(f"📊 Total samples: {len(valid_pairs)}")
+    print(f"📊 Found {r1_count} R1 files", file=log)
+    print(f"✅ Found {valid_count} valid pairs (skipped {skipped_count} small/empty files)", file=log)
+    if not stream:
+        print(f"📄 Manifest created: {output_file}")
+    print(f"📊 Total samples: {valid_count}", file=log)
     
-    return len(valid_pairs)
+    return valid_count
 
 def main():
     parser = argparse.ArgumentParser(description="Create STAR alignment sample manifest")
@@ -74,14 +161,19 @@ def main():
                        help="Output manifest file")
     parser.add_argument("--min-size", type=int, default=100000,
                        help="Minimum file size in bytes")
+    parser.add_argument("--workers", type=int, default=SCAN_WORKERS,
+                       help="Directories scanned concurrently")
+    parser.add_argument("--stream", action="store_true",
+                       help="Write manifest rows to stdout and progress to stderr")
     
     args = parser.parse_args()
     
     try:
-        count = create_sample_manifest(args.base_dir, args.output, args.min_size)
-        print(f"\n🎉 Success! Created manifest with {count} samples")
+        count = create_sample_manifest(args.base_dir, args.output, args.min_size, args.stream, args.workers)
+        if not args.stream:
+            print(f"\n🎉 Success! Created manifest with {count} samples")
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error: {e}", file=sys.stderr if args.stream else sys.stdout)
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+"""
+STAR Alignment Filesystem Utilities
+Size formatting, mount lookup and file-size helpers shared by the workflow scripts.
+"""
+
+import os
+import math
+import struct
+import ctypes
+
+# statx(2) constants from <fcntl.h> / <linux/stat.h>
+AT_FDCWD = -100
+AT_STATX_DONT_SYNC = 0x4000
+STATX_SIZE = 0x200
+STATX_BUFFER_SIZE = 256  # sizeof(struct statx)
+STATX_SIZE_OFFSET = 40  # offsetof(struct statx, stx_size)
+
+def format_size(num_bytes):
+    """Format a byte count the way `df -h` does (1024-based, rounded up, e.g. 3.3T)."""
+    size = float(num_bytes)
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = 'P'
+    if size < 10 and unit != 'B':
+        return f"{math.ceil(size * 10) / 10:.1f}{unit}"
+    return f"{math.ceil(size)}{unit}"
+
+def find_mount(path):
+    """Return (mount point, filesystem source) for the mount containing path."""
+    mount_point, filesystem, _ = find_mount_entry(path)
+    return mount_point, filesystem
+
+def find_mount_entry(path):
+    """Return (mount point, filesystem source, filesystem type) for the mount containing path."""
+    mount_point = os.path.realpath(path)
+    while not os.path.ismount(mount_point):
+        mount_point = os.path.dirname(mount_point)
+    
+    filesystem, fstype = "unknown", "unknown"
+    try:
+        with open('/proc/mounts') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 2 and fields[1] == mount_point:
+                    filesystem, fstype = fields[0], fields[2]  # last entry wins, as with stacked mounts
+    except OSError:
+        pass
+    return mount_point, filesystem, fstype
+
+def _load_statx():
+    """Return libc's statx(2), or None where it is unavailable (non-Linux, glibc < 2.28)."""
+    try:
+        statx = ctypes.CDLL(None, use_errno=True).statx
+    except (OSError, AttributeError):
+        return None
+    statx.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_uint, ctypes.c_void_p)
+    statx.restype = ctypes.c_int
+    return statx
+
+_statx = _load_statx()
+
+def statx_size(path):
+    """File size via statx(AT_STATX_DONT_SYNC), which lets Lustre answer without syncing with the OSTs."""
+    buf = ctypes.create_string_buffer(STATX_BUFFER_SIZE)
+    if _statx(AT_FDCWD, os.fsencode(path), AT_STATX_DONT_SYNC, STATX_SIZE, buf) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err), str(path))
+    return struct.unpack_from('=Q', buf, STATX_SIZE_OFFSET)[0]
+
+def stat_size(path):
+    """File size via a plain stat."""
+    return os.stat(path).st_size
+
+def size_reader(path):
+    """Pick the cheapest file-size function for files under path.
+    
+    Possibly stale sizes are fine for the workflow's thresholds, so Lustre
+    mounts use statx_size; everything else uses stat_size.
+    """
+    if _statx is not None and find_mount_entry(path)[2] == 'lustre':
+        return statx_size
+    return stat_size
@@ -10,10 +10,89 @@ import json
 import time
 import argparse
 import os
+import re
 from pathlib import Path
 from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from fsutil import format_size, size_reader, stat_size
 import sys
 
+LSF_STATUS_TTL = 10  # Seconds a bjobs result is reused
+BAM_CHECK_WORKERS = 32  # Concurrent BAM stats per tick
+LOG_CHECK_WORKERS = 16  # Concurrent log tail reads per tick
+MIN_BAM_SIZE = 1000  # Bytes; smaller BAMs are treated as incomplete
+DIR_MTIME_SETTLE_NS = 2_000_000_000  # Directories changed more recently are rescanned (coarse NFS mtimes)
+
+def bam_size(bam_file, size_of=stat_size):
+    """Size of a BAM file in bytes, or -1 if it does not exist (a single stat)."""
+    try:
+        return size_of(bam_file)
+    except OSError:
+        return -1
+
+def scan_bam_dir(bam_dir, sample_ids, known_mtime_ns=None, size_of=stat_size):
+    """Find completed BAMs for sample_ids in one output directory.
+    
+    Returns (directory mtime to remember, or None to rescan next time;
+    {sample_id: size} of completed BAMs). star_align.sh moves each BAM into
+    place when it is finished, so an unchanged directory mtime means no new
+    BAMs and the listing is skipped.
+    """
+    try:
+        mtime_ns = os.stat(bam_dir).st_mtime_ns
+    except OSError:
+        return None, {}
+    if mtime_ns == known_mtime_ns:
+        return mtime_ns, {}
+    
+    try:
+        with os.scandir(bam_dir) as it:
+            names = {entry.name for entry in it if entry.name.endswith(".bam")}
+    except OSError:
+        return None, {}
+    
+    sizes = {}
+    settled = time.time_ns() - mtime_ns > DIR_MTIME_SETTLE_NS
+    for sample_id in sample_ids:
+        name = f"{sample_id}.bam"
+        if name not in names:
+            continue
+        size = bam_size(f"{bam_dir}/{name}", size_of)
+        if size > MIN_BAM_SIZE:
+            sizes[sample_id] = size
+        elif size >= 0:
+            settled = False  # Present but too small: check again next tick
+    
+    return (mtime_ns if settled else None), sizes
+
+LOG_TAIL_BYTES = 8192  # Status markers are written just before a job exits
+
+def read_log_tail(log_file, size=LOG_TAIL_BYTES):
+    """Read the last `size` bytes of a log file."""
+    with open(log_file, 'rb') as f:
+        f.seek(max(0, os.fstat(f.fileno()).st_size - size))
+        return f.read()
+
+# All status markers in one pattern, so each log tail is scanned once
+LOG_MARKERS = re.compile(rb"(?P<completed>STAR alignment completed successfully)|(?P<failed>ERROR:|FAILED)")
+
+def classify_log(log_file):
+    """Classify a job log as completed, failed or running (None if unreadable).
+    
+    The completion marker takes precedence over failure markers.
+    """
+    try:
+        content = read_log_tail(log_file)
+    except OSError:
+        return None
+    markers = {match.lastgroup for match in LOG_MARKERS.finditer(content)}
+    if "completed" in markers:
+        return "completed"
+    return "failed" if markers else "running"
+
+REPORT_BANNER = "\n".join(["=" * 60, "🧬 STAR ALIGNMENT MONITOR", "=" * 60])
+
 class STARMonitor:
     """Monitor STAR alignment job progress."""
     
@@ -22,41 +101,128 @@ class STARMonitor:
         self.manifest_file = self.workflow_dir / "data" / "sample_manifest.csv"
         self.log_dir = self.workflow_dir / "logs"
         self.bam_dir = self.workflow_dir / "outputs" / "bams"
+        self._dir_mtimes = {}  # BAM output directory -> st_mtime_ns when last scanned with nothing in flight
+        self._size_of = size_reader(self.workflow_dir / "outputs")  # statx without OST sync on Lustre
+        
+        # Sample ID -> BAM size for samples known to be complete, kept across runs
+        self.completion_cache_file = self.workflow_dir / "data" / "monitor_cache.json"
+        self._completed = self._load_completed()
+        self._lsf_status = None  # (monotonic timestamp, counts by status)
+        self._manifest_key = None  # (st_mtime_ns, st_size) of the parsed manifest
+        self._manifest = None  # [(sample_id, r1_path)]
+        
+    def _load_completed(self):
+        """Load completed sample BAM sizes, discarding them if the manifest has changed since."""
+        try:
+            with open(self.completion_cache_file) as f:
+                cache = json.load(f)
+            if cache.get("manifest_mtime_ns") == os.stat(self.manifest_file).st_mtime_ns:
+                return dict(cache.get("completed", {}))
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+        return {}
+    
+    def _save_completed(self):
+        """Persist completed sample BAM sizes (written to a temp file, then renamed into place)."""
+        try:
+            cache = {
+                "manifest_mtime_ns": os.stat(self.manifest_file).st_mtime_ns,
+                "completed": self._completed
+            }
+            tmp_file = self.completion_cache_file.with_suffix(".json.tmp")
+            with open(tmp_file, 'w') as f:
+                json.dump(cache, f)
+            os.replace(tmp_file, self.completion_cache_file)
+        except OSError:
+            pass
         
+    def _load_manifest(self):
+        """Return the manifest as (sample_id, r1_path) pairs, re-parsing only when the file changes."""
+        try:
+            st = os.stat(self.manifest_file)
+            key = (st.st_mtime_ns, st.st_size)
+            if key == self._manifest_key:
+                return self._manifest
+            
+            with open(self.manifest_file, 'r', newline='') as f:
+                reader = csv.reader(f)
+                header = next(reader)
+                id_col, r1_col = header.index('sample_id'), header.index('r1_path')
+                width = max(id_col, r1_col)
+                samples = [(row[id_col], row[r1_col]) for row in reader if len(row) > width]
+        except Exception:
+            return None
+        
+        self._manifest_key, self._manifest = key, samples
+        return samples
+    
     def get_lsf_status(self):
-        """Get LSF job status."""
+        """Get LSF job counts by status ({} when there are no jobs or LSF is unavailable)."""
+        if self._lsf_status is not None and time.monotonic() - self._lsf_status[0] < LSF_STATUS_TTL:
+            return self._lsf_status[1]
+        
+        counts = {}
         try:
-            result = subprocess.run(['bjobs', '-J', 'star_align*'], 
-                                  capture_output=True, text=True, check=True)
-            return result.stdout
-        except subprocess.CalledProcessError:
-            return "No LSF jobs found"
+            result = subprocess.run(['bjobs', '-J', 'star_align*', '-o', 'jobid stat name', '-json'],
+                                  capture_output=True, text=True)
+            for job in json.loads(result.stdout).get("RECORDS", []):
+                status = job.get("STAT", "UNKNOWN")
+                counts[status] = counts.get(status, 0) + 1
+        except (OSError, ValueError, AttributeError):
+            pass
+        
+        self._lsf_status = (time.monotonic(), counts)
+        return counts
     
     def get_sample_stats(self):
         """Get sample processing statistics."""
-        try:
-            with open(self.manifest_file, 'r') as f:
-                reader = csv.DictReader(f)
-                samples = list(reader)
-        except Exception:
+        samples = self._load_manifest()
+        if samples is None:
             return 0, 0, 0
         
         total_samples = len(samples)
         completed_samples = 0
+        pending_dirs = {}  # BAM output directory -> pending sample IDs
+        
+        # BAMs mirror the input tree under outputs/ (see star_align.sh)
+        base_dir = "/data/salomonis-archive/czb-tabula-sapiens"
+        base_len = len(base_dir)
+        output_base_dir = str(self.workflow_dir / "outputs")
+        completed = self._completed
         
-        for sample in samples:
-            sample_id = sample['sample_id']
-            r1_path = sample['r1_path']
+        for sample_id, r1_path in samples:
+            if sample_id in completed:
+                completed_samples += 1
+                continue
             
             # Extract directory structure from input path
-            input_dir = os.path.dirname(r1_path)
-            base_dir = "/data/salomonis-archive/czb-tabula-sapiens"
-            output_base_dir = str(self.workflow_dir / "outputs")
-            bam_output_dir = input_dir.replace(base_dir, output_base_dir)
+            input_dir = r1_path.rpartition('/')[0]
+            if input_dir.startswith(base_dir):
+                bam_output_dir = output_base_dir + input_dir[base_len:]
+            else:
+                bam_output_dir = input_dir.replace(base_dir, output_base_dir)
             
-            bam_file = Path(bam_output_dir) / f"{sample_id}.bam"
-            if bam_file.exists() and bam_file.stat().st_size > 1000:
-                completed_samples += 1
+            pending_dirs.setdefault(bam_output_dir, []).append(sample_id)
+        
+        # One task per output directory; unchanged directories cost a single stat
+        if pending_dirs:
+            dir_mtimes = self._dir_mtimes
+            with ThreadPoolExecutor(max_workers=BAM_CHECK_WORKERS) as executor:
+                futures = [(bam_dir, executor.submit(scan_bam_dir, bam_dir, sample_ids,
+                                                     dir_mtimes.get(bam_dir), self._size_of))
+                           for bam_dir, sample_ids in pending_dirs.items()]
+                newly_completed = {}
+                for bam_dir, future in futures:
+                    mtime_ns, sizes = future.result()
+                    if mtime_ns is None:
+                        dir_mtimes.pop(bam_dir, None)
+                    else:
+                        dir_mtimes[bam_dir] = mtime_ns
+                    newly_completed.update(sizes)
+            if newly_completed:
+                completed_samples += len(newly_completed)
+                self._completed.update(newly_completed)
+                self._save_completed()
         
         pending_samples = total_samples - completed_samples
         return total_samples, completed_samples, pending_samples
@@ -67,81 +233,73 @@ class STARMonitor:
             return 0, 0, 0
         
         log_files = list(self.log_dir.glob("star_align_*.out"))
-        completed = 0
-        failed = 0
-        running = 0
-        
-        for log_file in log_files:
-            try:
-                with open(log_file, 'r') as f:
-                    content = f.read()
-                    if "STAR alignment completed successfully" in content:
-                        completed += 1
-                    elif "ERROR:" in content or "FAILED" in content:
-                        failed += 1
-                    else:
-                        running += 1
-            except Exception:
-                continue
         
-        return completed, failed, running
+        # Each log costs an open plus an 8 KiB read, so overlap them like the BAM stats
+        with ThreadPoolExecutor(max_workers=LOG_CHECK_WORKERS) as executor:
+            states = Counter(executor.map(classify_log, log_files))
+        
+        return states["completed"], states["failed"], states["running"]
     
     def get_storage_usage(self):
-        """Get storage usage."""
-        try:
-            result = subprocess.run(['du', '-sh', str(self.bam_dir)], 
-                                  capture_output=True, text=True, check=True)
-            return result.stdout.strip()
-        except subprocess.CalledProcessError:
-            return "Unknown"
+        """Get storage used by completed BAM files, as recorded by the last sample scan."""
+        return f"{format_size(sum(self._completed.values()))} in {len(self._completed)} BAMs"
     
     def generate_report(self):
         """Generate status report."""
-        print("=" * 60)
-        print("🧬 STAR ALIGNMENT MONITOR")
-        print("=" * 60)
-        print(f"⏰ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print()
+        timestamp = datetime.now()
+        
+        # bjobs, the BAM stats and the log reads are independent and mostly
+        # waiting, so collect them together; the tick takes the slowest of the three
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            lsf_future = executor.submit(self.get_lsf_status)
+            samples_future = executor.submit(self.get_sample_stats)
+            logs_future = executor.submit(self.get_log_stats)
+        lsf_status = lsf_future.result()
+        total, completed, pending = samples_future.result()
+        log_completed, log_failed, log_running = logs_future.result()
+        storage = self.get_storage_usage()  # Sizes recorded by the sample scan above
+        
+        # Render the whole report and write it at once
+        lines = [REPORT_BANNER, f"⏰ Timestamp: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}", ""]
         
         # LSF Status
-        print("📊 LSF JOB STATUS:")
-        print("-" * 20)
-        lsf_status = self.get_lsf_status()
-        print(lsf_status)
-        print()
+        lines += ["📊 LSF JOB STATUS:", "-" * 20]
+        if lsf_status:
+            lines += [f"{status}: {count}" for status, count in sorted(lsf_status.items())]
+        else:
+            lines.append("No LSF jobs found")
+        lines.append("")
         
         # Sample Statistics
-        print("📈 SAMPLE STATISTICS:")
-        print("-" * 20)
-        total, completed, pending = self.get_sample_stats()
+        lines += ["📈 SAMPLE STATISTICS:", "-" * 20]
         if total > 0:
             completion_rate = (completed / total) * 100
-            print(f"Total samples: {total}")
-            print(f"Completed: {completed}")
-            print(f"Pending: {pending}")
-            print(f"Completion rate: {completion_rate:.1f}%")
+            lines += [f"Total samples: {total}",
+                      f"Completed: {completed}",
+                      f"Pending: {pending}",
+                      f"Completion rate: {completion_rate:.1f}%"]
         else:
-            print("No samples found")
-        print()
+            lines.append("No samples found")
+        lines.append("")
         
         # Log Statistics
-        print("📝 LOG STATISTICS:")
-        print("-" * 15)
-        log_completed, log_failed, log_running = self.get_log_stats()
-        print(f"Logs completed: {log_completed}")
-        print(f"Logs failed: {log_failed}")
-        print(f"Logs running: {log_running}")
-        print()
+        lines += ["📝 LOG STATISTICS:", "-" * 15,
+                  f"Logs completed: {log_completed}",
+                  f"Logs failed: {log_failed}",
+                  f"Logs running: {log_running}",
+                  ""]
         
         # Storage Usage
-        print("💾 STORAGE USAGE:")
-        print("-" * 15)
-        storage = self.get_storage_usage()
-        print(f"BAM files: {storage}")
-        print()
+        lines += ["💾 STORAGE USAGE:", "-" * 15,
+                  f"BAM files: {storage}",
+                  ""]
+        
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
         
         return {
             'timestamp': datetime.now().isoformat(),
+            'lsf_status': lsf_status,
             'total_samples': total,
             'completed_samples': completed,
             'pending_samples': pending,